@@ -1,20 +1,28 @@
-from flask import Flask, render_template, session, redirect, url_for, flash, request, jsonify, make_response
+from flask import Flask, render_template, session, redirect, url_for, flash, request, jsonify, make_response, g, Response, stream_with_context
 from sqlalchemy.exc import IntegrityError
 from werkzeug.security import generate_password_hash, check_password_hash
 from forms import LoginForm, PaginationForm, PokemonAddForm, PokemonDeleteForm, PokemonEditForm, PokemonSearchForm, SignupForm, AddWordForm, ForgotPasswordForm, UserActionForm, UserSearchForm, ViewUserForm
-from models import db,UserAcc, UserAchievement, UserWords, Pokemon, Achievement, Vocabulary, Notification, UserPokemon
+from models import db,UserAcc, UserAchievement, UserWords, Pokemon, Achievement, Vocabulary, Notification, UserPokemon, UserStats, UserActivity, EvaluationJob, CatalogVersion, DictionaryEntry, WordOfDaySchedule, Broadcast, BroadcastCursor, UserPeriodStats, LeaderboardSnapshot, SnapshottedPeriod
 from functools import wraps
 import os
-from sqlalchemy import or_, and_  
+from sqlalchemy import or_, and_, case, cast, literal, select, text, update, String
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from datetime import datetime, date, timedelta
 import pytz
 from sqlalchemy.sql import func
-import random, requests
+import random, requests, json, re, bisect, base64
 import smtplib, hashlib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from dotenv import load_dotenv
 import traceback
+import time
+import threading
+import queue
+from collections import deque
+import gzip
+import click
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 
 app = Flask(__name__)
@@ -37,6 +45,10 @@ app.config['MAX_CONTENT_LENGTH'] = 2 * 1024 * 1024  # 2MB max
 
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '.env'), encoding='utf-8')
 
+# The reminder thread only runs in a process that asks for it (one worker, or
+# 'flask run-scheduler'); otherwise run 'flask send-reminders' from cron.
+app.config['REMINDER_SCHEDULER'] = os.environ.get('REMINDER_SCHEDULER') == '1'
+
 # Email verification storage (in production, use Redis or database)
 email_verification_store = {}
 
@@ -72,6 +84,94 @@ def admin_required(f):
 
 
 
+# ---------- CATALOG CACHE ----------
+# Achievements and Pokémon are reference data that only admins change. Each
+# process keeps a read-only copy indexed by id, family and rarity, and checks
+# the catalog_version row once per request; admin writes bump that row, so
+# every worker process reloads on its next request.
+class AchievementRecord:
+    __slots__ = ('achievement_id', 'pokemon_id', 'name', 'description', 'points_reward', 'requirement', 'metric')
+
+    def __init__(self, achievement):
+        for field in self.__slots__:
+            setattr(self, field, getattr(achievement, field))
+
+
+class PokemonRecord:
+    __slots__ = ('pokemon_id', 'name', 'url', 'min_points_required', 'rarity', 'family_id')
+
+    def __init__(self, pokemon):
+        for field in self.__slots__:
+            setattr(self, field, getattr(pokemon, field))
+
+
+class Catalog:
+    __slots__ = ('version', 'achievements', 'achievements_by_id', 'pokemon',
+                 'pokemon_by_id', 'pokemon_by_family', 'pokemon_by_rarity')
+
+    def __init__(self, version, achievements, pokemon):
+        self.version = version
+        self.achievements = tuple(achievements)
+        self.achievements_by_id = {a.achievement_id: a for a in self.achievements}
+        self.pokemon = tuple(pokemon)
+        self.pokemon_by_id = {p.pokemon_id: p for p in self.pokemon}
+        
+        # Families are ordered by evolution stage
+        families = {}
+        rarities = {}
+        for p in sorted(self.pokemon, key=lambda p: (p.min_points_required or 0, p.pokemon_id)):
+            families.setdefault(p.family_id, []).append(p)
+            rarities.setdefault(p.rarity, []).append(p)
+        self.pokemon_by_family = {key: tuple(value) for key, value in families.items()}
+        self.pokemon_by_rarity = {key: tuple(value) for key, value in rarities.items()}
+
+    def get_pokemon(self, pokemon_id):
+        return self.pokemon_by_id.get(pokemon_id)
+
+    def get_achievement(self, achievement_id):
+        return self.achievements_by_id.get(achievement_id)
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog():
+    """Return the cached catalog, reloading it if another process changed the data."""
+    global _catalog
+    
+    if 'catalog' in g:
+        return g.catalog
+    
+    version = db.session.query(CatalogVersion.version).filter_by(catalog_id=1).scalar() or 0
+    catalog = _catalog
+    
+    if catalog is None or catalog.version != version:
+        with _catalog_lock:
+            catalog = _catalog
+            if catalog is None or catalog.version != version:
+                catalog = Catalog(
+                    version,
+                    [AchievementRecord(a) for a in Achievement.query.order_by(Achievement.achievement_id)],
+                    [PokemonRecord(p) for p in Pokemon.query.order_by(Pokemon.pokemon_id)]
+                )
+                _catalog = catalog
+    
+    g.catalog = catalog
+    return catalog
+
+
+def invalidate_catalog():
+    """Bump the catalog version so every process reloads. The caller commits."""
+    stmt = sqlite_insert(CatalogVersion).values(catalog_id=1, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['catalog_id'],
+        set_={'version': CatalogVersion.version + 1}
+    )
+    db.session.execute(stmt)
+    g.pop('catalog', None)
+
+
 @app.route('/api/get_user_points')
 @login_required
 def get_user_points():
@@ -82,95 +182,19 @@ def get_user_points():
         'total_points': user.total_points or 0
     })
 
-def check_and_update_achievements(user):
-    """Check all achievements and award them if user qualifies."""
-    all_achievements = Achievement.query.all()
-    
-    for achievement in all_achievements:
-        # Get or create UserAchievement record
-        user_achievement = UserAchievement.query.filter_by(
-            user_id=user.user_id,
-            achievement_id=achievement.achievement_id
-        ).first()
-        
-        if not user_achievement:
-            # Create new UserAchievement record
-            user_achievement = UserAchievement(
-                user_id=user.user_id,
-                achievement_id=achievement.achievement_id,
-                current_progress=0,
-                date_earned=None  # Explicitly set to None
-            )
-            db.session.add(user_achievement)
-        
-        # Only update if not already earned
-        if not user_achievement.date_earned:
-            # Calculate current progress based on achievement
-            current_progress = 0
-            
-            # WORD COLLECTOR ACHIEVEMENT - Learn 10 different words
-            if "Word Collector" in achievement.name:
-                current_progress = UserWords.query.filter_by(user_id=user.user_id).count()
-                
-            # ZZZ ACHIEVEMENT - Logout for the first time
-            elif "Zzz" in achievement.name:
-                current_progress = 1 if user.last_logout else 0
-                
-            # SOLO LEVELING ACHIEVEMENT - Reach 500 points
-            elif "Solo Leveling" in achievement.name:
-                current_progress = user.total_points or 0
-                
-            # JOURNEY BEGINS ACHIEVEMENT - Welcome to VocabuLearner!
-            elif "Journey Begins" in achievement.name:
-                current_progress = 1  # Always earned when account is created
-            
-            # Update progress
-            user_achievement.current_progress = current_progress
-
-        db.session.commit()
-
 def update_user_streak(user):
+    """Refresh the streak from the activity bitmap and record the login time."""
     
     # Skip streak updates for admin users
     if hasattr(user, 'is_admin') and user.is_admin:
         return
     
-    today = datetime.now(ph_timezone).date()
-    
-    # ALWAYS set streak to 1 if it's 0 (from default)
-    if user.current_streak == 0:
-        user.current_streak = 1
-        user.longest_streak = 1
-        user.last_login = datetime.now(ph_timezone)
-        return
-    
-    # If first login ever
-    if not user.last_login:
-        user.current_streak = 1
-        user.longest_streak = 1
-        user.last_login = datetime.now(ph_timezone)
-        return
-    
-    # Convert last_login to Philippine timezone
-    if user.last_login.tzinfo is None:
-        last_login_ph = pytz.utc.localize(user.last_login).astimezone(ph_timezone)
-    else:
-        last_login_ph = user.last_login.astimezone(ph_timezone)
-    
-    last_login_date = last_login_ph.date()
-    days_difference = (today - last_login_date).days
-    
-    if days_difference == 1:
-        # Consecutive day
-        user.current_streak += 1
-        if user.current_streak > user.longest_streak:
-            user.longest_streak = user.current_streak
-        user.last_login = datetime.now(ph_timezone)
-    elif days_difference > 1:
-        # Streak broken
-        user.current_streak = 1
-        user.last_login = datetime.now(ph_timezone)
-    # If days_difference == 0: Already logged in today - do nothing
+    # Streaks count learning days, so a login alone never extends one
+    activity = UserActivity.query.get(user.user_id)
+    today = activity_day(tz=get_user_timezone(user))
+    user.current_streak = current_activity_streak(activity, today) if activity else 0
+    user.longest_streak = max(user.longest_streak or 0, user.current_streak)
+    user.last_login = datetime.now(ph_timezone)
 
 @app.route('/insert_achievement_samples')
 def insert_achievement_samples():
@@ -181,37 +205,43 @@ def insert_achievement_samples():
                 "name": "Vocabulary Novice",
                 "description": "Learn your first 10 words",
                 "points_reward": 100,
-                "requirement": 10
+                "requirement": 10,
+                "metric": "words_learned"
             },
             {
                 "name": "Word Collector",
                 "description": "Learn 50 different words",
                 "points_reward": 250,
-                "requirement": 50
+                "requirement": 50,
+                "metric": "words_learned"
             },
             {
                 "name": "Language Master",
                 "description": "Learn 100 words and maintain a 90% accuracy",
                 "points_reward": 500,
-                "requirement": 100
+                "requirement": 100,
+                "metric": "words_learned"
             },
             {
                 "name": "Flashcard Champion",
                 "description": "Complete 20 flashcard sessions",
                 "points_reward": 300,
-                "requirement": 20
+                "requirement": 20,
+                "metric": "sessions_completed"
             },
             {
                 "name": "Quiz Expert",
                 "description": "Score 90% or higher in 10 multiple choice quizzes",
                 "points_reward": 400,
-                "requirement": 10
+                "requirement": 10,
+                "metric": None
             },
             {
                 "name": "Matching Pro",
                 "description": "Complete 15 matching games with perfect score",
                 "points_reward": 350,
-                "requirement": 15
+                "requirement": 15,
+                "metric": None
             }
         ]
         
@@ -233,11 +263,13 @@ def insert_achievement_samples():
                         name=achievement_data["name"],
                         description=achievement_data["description"],
                         points_reward=achievement_data["points_reward"],
-                        requirement=achievement_data["requirement"]
+                        requirement=achievement_data["requirement"],
+                        metric=achievement_data["metric"]
                     )
                     db.session.add(new_achievement)
                     achievements_added += 1
         
+        invalidate_catalog()
         db.session.commit()
         
         return jsonify({
@@ -604,11 +636,19 @@ def delete_account():
         # Delete user achievements
         UserAchievement.query.filter_by(user_id=user_id).delete()
         
+        # Delete user counters and pending evaluations
+        UserStats.query.filter_by(user_id=user_id).delete()
+        UserActivity.query.filter_by(user_id=user_id).delete()
+        EvaluationJob.query.filter_by(user_id=user_id).delete()
+        BroadcastCursor.query.filter_by(user_id=user_id).delete()
+        UserPeriodStats.query.filter_by(user_id=user_id).delete()
+        
         # Delete the user
         user = UserAcc.query.get(user_id)
         if user:
             db.session.delete(user)
             db.session.commit()
+            remove_from_leaderboard(user_id)
             
             # Clear session
             session.clear()
@@ -726,6 +766,7 @@ def upload_avatar():
         try:
             user.profile_picture = avatar_url
             db.session.commit()
+            update_leaderboard(user)
             return jsonify({
                 'success': True,
                 'avatar_url': avatar_url,
@@ -792,11 +833,16 @@ def update_profile():
         if existing_user and existing_user.user_id != user_id:
             return jsonify({'error': 'Email already in use'}), 400
         user.email = value
+    elif field == 'timezone':
+        if value not in pytz.all_timezones_set:
+            return jsonify({'error': 'Unknown timezone'}), 400
+        user.timezone = value
     else:
         return jsonify({'error': 'Invalid field'}), 400
    
     try:
         db.session.commit()
+        update_leaderboard(user)
         return jsonify({'message': 'Profile updated successfully'})
     except Exception as e:
         db.session.rollback()
@@ -832,7 +878,7 @@ def login():
                 db.session.commit()
                 
                 # CHECK ACHIEVEMENTS AFTER LOGIN (Journey Begins if not already)
-                check_and_update_achievements(user)
+                enqueue_user_evaluation(user.user_id)
                 
                 # Log success
                 print(f"LOGIN: User {user.user_id} ({user.name}) logged in")
@@ -888,21 +934,11 @@ def signup():
         db.session.add(new_user)
         
         try:
-            # CREATE USERACHIEVEMENT ENTRIES FOR NEW USER
-            all_achievements = Achievement.query.all()
-            for achievement in all_achievements:
-                user_achievement = UserAchievement(
-                    user_id=new_user.user_id,  # This will work because user_id is auto-increment
-                    achievement_id=achievement.achievement_id,
-                    current_progress=0,
-                    date_earned=None
-                )
-                db.session.add(user_achievement)
-            
             db.session.commit()
+            update_leaderboard(new_user)
             
-            # CHECK ACHIEVEMENTS AFTER ACCOUNT CREATION (Journey Begins)
-            check_and_update_achievements(new_user)
+            # CREATE USERACHIEVEMENT ENTRIES FOR NEW USER (Journey Begins included)
+            enqueue_user_evaluation(new_user.user_id)
             
         except IntegrityError:
             db.session.rollback()
@@ -936,6 +972,7 @@ def logout():
                 
                 # Update last_logout timestamp in PHT
                 user.last_logout = current_time
+                bump_user_stats(user.user_id, logouts=1)
                 
                 # Also update other fields if needed
                 # For example, if you want to calculate session duration:
@@ -949,7 +986,7 @@ def logout():
                 db.session.commit()
                 
                 # CHECK ACHIEVEMENTS AFTER LOGOUT (for Zzz achievement)
-                check_and_update_achievements(user)
+                enqueue_user_evaluation(user.user_id)
                 
             else:
                 print(f"WARNING: User with user_id {user_id} not found in database")
@@ -999,257 +1036,1317 @@ def features():
     return render_template('features.html')
 
 
-def get_word_of_the_day(user_id=None):
-    today = date.today()
+# ---------- DICTIONARY CACHE ----------
+# Word details from the dictionary API are cached in dictionary_entry so page
+# requests never wait on the upstream service more than once per word per TTL.
+# Expired entries are served stale while a background thread refreshes them.
+DICTIONARY_API_URL = os.environ.get('DICTIONARY_API_URL', 'https://api.dictionaryapi.dev/api/v2/entries/en/')
+DICTIONARY_TIMEOUT = (2, 4)  # (connect, read) seconds
+DICTIONARY_TTL = timedelta(days=30)
+DICTIONARY_NEGATIVE_TTL = timedelta(days=1)
+DICTIONARY_STALE_TTL = timedelta(days=7)
+DICTIONARY_MAX_DEFINITIONS = 10
+
+_dictionary_session = None
+_dictionary_refreshing = set()
+_dictionary_inflight = {}
+_dictionary_lock = threading.Lock()
+
+
+def normalize_word(word):
+    return (word or '').strip().lower()[:100]
+
+
+def get_dictionary_session():
+    """Shared HTTP session so lookups reuse pooled connections."""
+    global _dictionary_session
+    
+    with _dictionary_lock:
+        if _dictionary_session is None:
+            session_ = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0)
+            session_.mount('http://', adapter)
+            session_.mount('https://', adapter)
+            _dictionary_session = session_
+    return _dictionary_session
+
+
+def dictionary_entry_to_dict(entry):
+    definitions = json.loads(entry.definitions or '[]')
+    return {
+        'word': entry.word,
+        'found': entry.found,
+        'pronunciation': entry.pronunciation or '',
+        'part_of_speech': entry.part_of_speech or '',
+        'definitions': definitions,
+        'examples': [d['example'] for d in definitions if d.get('example')],
+        'fetched_at': entry.fetched_at
+    }
+
+
+def parse_dictionary_response(data):
+    """Pull pronunciation, part of speech, definitions and examples from an API response."""
+    entry = data[0] if data else {}
+    
+    pronunciation = entry.get('phonetic') or ''
+    if not pronunciation:
+        pronunciation = next((p['text'] for p in entry.get('phonetics', []) if p.get('text')), '')
+    
+    definitions = []
+    for meaning in entry.get('meanings', []):
+        for d in meaning.get('definitions', []):
+            definitions.append({
+                'part_of_speech': meaning.get('partOfSpeech', ''),
+                'definition': d.get('definition', ''),
+                'example': d.get('example', '')
+            })
+    definitions = definitions[:DICTIONARY_MAX_DEFINITIONS]
+    
+    return {
+        'pronunciation': pronunciation[:100],
+        'part_of_speech': (definitions[0]['part_of_speech'] if definitions else '')[:50],
+        'definitions': definitions
+    }
+
+
+def request_dictionary_data(word):
+    """GET a word from the dictionary API. Returns (status_code, parsed data or None); network errors raise."""
+    url = app.config.get('DICTIONARY_API_URL', DICTIONARY_API_URL) + requests.utils.quote(word)
+    response = get_dictionary_session().get(url, timeout=app.config.get('DICTIONARY_TIMEOUT', DICTIONARY_TIMEOUT))
+    if response.ok:
+        return response.status_code, parse_dictionary_response(response.json())
+    return response.status_code, None
+
+
+def dictionary_entry_row(word, parsed, now):
+    """dictionary_entry values for a parsed response (None means the word is unknown)."""
+    found = bool(parsed and parsed['definitions'])
+    return {
+        'word': word,
+        'found': found,
+        'pronunciation': parsed['pronunciation'] if found else None,
+        'part_of_speech': parsed['part_of_speech'] if found else None,
+        'definitions': json.dumps(parsed['definitions'] if found else []),
+        'fetched_at': now,
+        'expires_at': now + (DICTIONARY_TTL if found else DICTIONARY_NEGATIVE_TTL)
+    }
+
+
+def store_dictionary_entries(rows):
+    """Upsert dictionary_entry rows in one statement. The caller commits."""
+    stmt = sqlite_insert(DictionaryEntry).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['word'],
+        set_={name: getattr(stmt.excluded, name) for name in rows[0] if name != 'word'}
+    )
+    db.session.execute(stmt)
+
+
+def session_has_writes():
+    """True if the session holds changes that are not committed yet, flushed or not."""
+    if db.session.new or db.session.dirty or db.session.deleted:
+        return True
+    # sqlite3 only opens a transaction for a write, so this is False after reads
+    session = db.session()
+    return session.in_transaction() and session.connection().connection.dbapi_connection.in_transaction
+
+
+def fetch_dictionary_entry(word):
+    """Fetch a word from the dictionary API and store it. Returns None if the API is unavailable.
+
+    The entry is committed on the session before returning, so that waiting
+    lookups of the same word can read it. Call this before making any other
+    changes in the session; with uncommitted writes pending it stores nothing.
+    """
+    if session_has_writes():
+        print(f"Not fetching '{word}': the session has uncommitted changes")
+        return None
+    
+    try:
+        status_code, parsed = request_dictionary_data(word)
+    except (requests.RequestException, ValueError) as e:
+        print(f"Error fetching word details: {e}")
+        return None
+    
+    if parsed is None and status_code != 404:
+        print(f"Dictionary API returned {status_code} for '{word}'")
+        return None
+    
+    store_dictionary_entries([dictionary_entry_row(word, parsed, datetime.utcnow())])
+    db.session.commit()
+    
+    return dictionary_entry_to_dict(DictionaryEntry.query.populate_existing().get(word))
+
+
+def fetch_dictionary_entry_once(word):
+    """Single-flight fetch: concurrent lookups of one word share a single upstream call."""
+    with _dictionary_lock:
+        flight = _dictionary_inflight.get(word)
+        is_leader = flight is None
+        if is_leader:
+            flight = _dictionary_inflight[word] = threading.Event()
+    
+    if is_leader:
+        try:
+            return fetch_dictionary_entry(word)
+        finally:
+            with _dictionary_lock:
+                _dictionary_inflight.pop(word, None)
+            flight.set()
+    
+    # Wait for the leader, then read what it stored
+    timeout = app.config.get('DICTIONARY_TIMEOUT', DICTIONARY_TIMEOUT)
+    flight.wait(sum(timeout) + 1)
+    entry = DictionaryEntry.query.populate_existing().get(word)
+    return dictionary_entry_to_dict(entry) if entry and entry.expires_at > datetime.utcnow() else None
+
+
+def refresh_dictionary_entry_async(word):
+    """Refresh an expired entry in the background, at most once at a time per word."""
+    with _dictionary_lock:
+        if word in _dictionary_refreshing:
+            return
+        _dictionary_refreshing.add(word)
+    
+    def refresh():
+        try:
+            with app.app_context():
+                fetch_dictionary_entry_once(word)
+        finally:
+            with _dictionary_lock:
+                _dictionary_refreshing.discard(word)
+    
+    threading.Thread(target=refresh, name=f'dictionary-refresh-{word}', daemon=True).start()
+
+
+def lookup_dictionary_entry(word):
+    """Cached dictionary details for a word, or None if unknown and the API is unavailable."""
+    word = normalize_word(word)
+    if not word:
+        return None
+    
+    entry = DictionaryEntry.query.get(word)
+    now = datetime.utcnow()
+    
+    if entry and entry.expires_at > now:
+        return dictionary_entry_to_dict(entry)
+    
+    # Serve stale entries immediately and refresh them in the background
+    if entry and entry.expires_at + DICTIONARY_STALE_TTL > now:
+        refresh_dictionary_entry_async(word)
+        return dictionary_entry_to_dict(entry)
+    
+    fresh = fetch_dictionary_entry_once(word)
+    if fresh is None and entry:
+        return dictionary_entry_to_dict(entry)
+    return fresh
+
+
+@app.route('/api/dictionary/<word>')
+@login_required
+def dictionary_lookup(word):
+    """Dictionary details for the add-word form, served from the shared cache"""
+    word = normalize_word(word)
+    if not word or not re.fullmatch(r"[a-z]+(?:['-][a-z]+)*", word):
+        return jsonify({'success': False, 'error': 'Invalid word'}), 400
+    
+    entry = lookup_dictionary_entry(word)
+    if entry is None:
+        response = jsonify({'success': False, 'error': 'Dictionary service unavailable'})
+        response.status_code = 503
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+    
+    if entry['found']:
+        response = jsonify({
+            'success': True,
+            'word': entry['word'],
+            'pronunciation': entry['pronunciation'],
+            'part_of_speech': entry['part_of_speech'],
+            'definitions': entry['definitions'],
+            'examples': entry['examples']
+        })
+        response.cache_control.max_age = int(DICTIONARY_TTL.total_seconds() // 30)
+    else:
+        response = jsonify({'success': False, 'error': 'Word not found'})
+        response.status_code = 404
+        response.cache_control.max_age = int(DICTIONARY_NEGATIVE_TTL.total_seconds() // 24)
+    
+    # Dictionary data is the same for every user, so browsers and proxies may reuse it
+    response.cache_control.public = True
+    response.set_etag(hashlib.md5(f"{entry['word']}:{entry['fetched_at'].isoformat()}".encode()).hexdigest())
+    return response.make_conditional(request)
+
+
+# ---------- VOCABULARY ENRICHMENT ----------
+class RateLimiter:
+    """Spaces calls out so that all threads together stay under a rate per second."""
+    
+    def __init__(self, per_second):
+        self.interval = 1.0 / per_second if per_second else 0
+        self.next_call = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_call - now
+            self.next_call = max(now, self.next_call) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def fetch_for_enrichment(word, limiter, retries):
+    """Parsed dictionary data for a word, or None if the API says 404. Raises on other errors once retries run out."""
+    for attempt in range(retries + 1):
+        limiter.wait()
+        try:
+            status_code, parsed = request_dictionary_data(word)
+            if parsed is not None or status_code == 404:
+                return parsed
+            error = requests.HTTPError(f"Dictionary API returned {status_code}")
+            # Other client errors won't change on retry; leave the word unenriched
+            if status_code < 500 and status_code != 429:
+                raise error
+        except (requests.RequestException, ValueError) as e:
+            error = e
+        
+        if attempt < retries:
+            time.sleep(0.5 * 2 ** attempt)
+    raise error
+
+
+def enrich_vocabulary(workers=8, per_second=10, batch_size=100, retries=3):
+    """Look up every unenriched word concurrently and store the results batch by batch.
+
+    enriched_at is the checkpoint: each batch commits on its own, so an
+    interrupted run resumes where it stopped. Words that still fail after the
+    retries stay unenriched for the next run. Returns (enriched, failed, seconds).
+    """
+    limiter = RateLimiter(per_second)
+    enriched = failed = 0
+    last_id = 0
+    started = time.perf_counter()
+    
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            batch = db.session.query(Vocabulary.word_id, Vocabulary.word).filter(
+                Vocabulary.enriched_at.is_(None),
+                Vocabulary.word_id > last_id
+            ).order_by(Vocabulary.word_id).limit(batch_size).all()
+            if not batch:
+                break
+            last_id = batch[-1].word_id
+            
+            futures = {
+                pool.submit(fetch_for_enrichment, normalize_word(word), limiter, retries): (word_id, normalize_word(word))
+                for word_id, word in batch
+            }
+            
+            now = datetime.utcnow()
+            updates = []
+            entries = {}
+            for future in as_completed(futures):
+                word_id, word = futures[future]
+                try:
+                    parsed = future.result()
+                except (requests.RequestException, ValueError) as e:
+                    failed += 1
+                    print(f"Could not enrich '{word}': {e}")
+                    continue
+                
+                entries[word] = dictionary_entry_row(word, parsed, now)
+                updates.append({
+                    'word_id': word_id,
+                    'pronunciation': entries[word]['pronunciation'],
+                    'part_of_speech': entries[word]['part_of_speech'],
+                    'enriched_at': now
+                })
+            
+            if updates:
+                # Bulk UPDATE by primary key, and warm the dictionary cache with the same data
+                db.session.execute(update(Vocabulary), updates)
+                store_dictionary_entries(list(entries.values()))
+            db.session.commit()
+            
+            enriched += len(updates)
+            elapsed = time.perf_counter() - started
+            print(f"Enriched {enriched} words ({failed} failed), {enriched / elapsed if elapsed else 0:.1f} words/s")
+    
+    return enriched, failed, time.perf_counter() - started
 
-    # Get all words marked as Word of the Day
-    word_of_day_candidates = Vocabulary.query.filter_by(is_word_of_day=True).all()
+
+def get_word_of_the_day(user_id=None):
+    today = datetime.now(ph_timezone).date()
+    
+    chosen = get_daily_word_of_day()
     
-    # If no Word of Day candidates at all
-    if not word_of_day_candidates:
-        # If no words marked as Word of Day, get any random word
-        all_words = Vocabulary.query.all()
+    # If the user already has today's word, pick one of the words they don't have yet
+    if chosen and user_id and UserWords.query.filter_by(user_id=user_id, word_id=chosen.word_id).first():
+        chosen = pick_word_of_day(today, exclude_user_id=user_id)
         
-        # If no words exist in the database, return a default response
-        if not all_words:
+        # If no Word of Day candidates remain after filtering
+        if not chosen:
             return {
                 "word_id": 0,
-                "word": "No words available",
+                "word": "All Words Learned",
                 "pronunciation": "",
                 "type": "",
-                "definition": "Please add vocabulary words to your collection.",
-                "example": "",
+                "definition": "You've already learned all available words!",
+                "example": "Check back tomorrow or add more words.",
                 "points_value": 0
             }
-        
-        word_of_day_candidates = all_words
-    
-    # If user_id is provided, exclude words they already have
-    if user_id:
-        # Get word IDs that the user already has
-        user_word_ids = db.session.query(UserWords.word_id).filter_by(user_id=user_id).all()
-        user_word_ids = [word_id for (word_id,) in user_word_ids]
-        
-        # Filter out words the user already has
-        if user_word_ids:
-            word_of_day_candidates = [
-                word for word in word_of_day_candidates 
-                if word.word_id not in user_word_ids
-            ]
-    
-    # If no Word of Day candidates remain after filtering
-    if not word_of_day_candidates:
-        return {
-            "word_id": 0,
-            "word": "All Words Learned",
-            "pronunciation": "",
-            "type": "",
-            "definition": "You've already learned all available words!",
-            "example": "Check back tomorrow or add more words.",
-            "points_value": 0
-        }
-    
-    # Create a hash based on today's date for consistent selection
-    today_str = today.strftime('%Y-%m-%d')
-    date_hash = hashlib.md5(today_str.encode()).hexdigest()
-    hash_int = int(date_hash, 16)
     
-    # Select word based on hash (consistent for the day)
-    word_index = hash_int % len(word_of_day_candidates)
-    chosen = word_of_day_candidates[word_index]
-
-    # Now chosen should definitely exist
+    # If no words exist in the database, return a default response
     if not chosen:
         return {
             "word_id": 0,
-            "word": "Error loading word",
+            "word": "No words available",
             "pronunciation": "",
             "type": "",
-            "definition": "Unable to load vocabulary word.",
+            "definition": "Please add vocabulary words to your collection.",
             "example": "",
             "points_value": 0
         }
 
-    # Fetch details from Dictionary API
-    try:
-        url = f"https://api.dictionaryapi.dev/api/v2/entries/en/{chosen.word}"
-        response = requests.get(url)
-        if not response.ok:
-            return {
-                "word_id": chosen.word_id,
-                "word": chosen.word,
-                "pronunciation": "",
-                "type": chosen.category or "",
-                "definition": chosen.definition or "Definition not found",
-                "example": chosen.example_sentence or "",
-                "points_value": chosen.points_value
-            }
-
-        data = response.json()[0]
-
-        pronunciation = ""
-        if data.get("phonetics"):
-            pronunciation = data["phonetics"][0].get("text", "")
-
-        meaning_block = data["meanings"][0]
-        definition_block = meaning_block["definitions"][0]
-
-        # Example handling: loop through all definitions
-        example = ""
-        for d in meaning_block["definitions"]:
-            if "example" in d:
-                example = d["example"]
-                break
-
-        return {
-            "word_id": chosen.word_id,
-            "word": chosen.word,
-            "pronunciation": pronunciation,
-            "type": meaning_block.get("partOfSpeech", ""),
-            "definition": definition_block.get("definition", ""),
-            "example": example or chosen.example_sentence or "",
-            "points_value": chosen.points_value
-        }
-    except Exception as e:
-        print(f"Error fetching word details: {e}")
+    # Fetch details from the dictionary cache
+    entry = lookup_dictionary_entry(chosen.word)
+    if not entry or not entry['found']:
         # Fallback to database values
         return {
             "word_id": chosen.word_id,
             "word": chosen.word,
             "pronunciation": "",
             "type": chosen.category or "",
-            "definition": chosen.definition or "Definition unavailable",
+            "definition": chosen.definition or "Definition not found",
             "example": chosen.example_sentence or "",
             "points_value": chosen.points_value
         }
-        
-def create_daily_reminder_notification(user_id):
-    """Create a single test notification - NO THREADING"""
-    notification = Notification(
-        user_id=user_id,
-        title="⏰ Practice Time!",
-        message="Test notification - Refresh to see!",
-        notification_type='test',
-        is_read=False,
-        created_at=datetime.utcnow()  # Use UTC
+    
+    first_definition = entry['definitions'][0]
+    
+    # Example handling: first example given for the primary part of speech
+    example = next(
+        (d['example'] for d in entry['definitions']
+         if d.get('example') and d['part_of_speech'] == first_definition['part_of_speech']),
+        ""
     )
     
-    db.session.add(notification)
-    db.session.commit()
+    return {
+        "word_id": chosen.word_id,
+        "word": chosen.word,
+        "pronunciation": entry['pronunciation'],
+        "type": entry['part_of_speech'],
+        "definition": first_definition.get('definition', ""),
+        "example": example or chosen.example_sentence or "",
+        "points_value": chosen.points_value
+    }
+
+# ---------- REMINDER SCHEDULER ----------
+# One daily learning reminder per user, sent inside a local-time window and
+# only if the user has not learned anything yet that day. Reminders are
+# generated with one INSERT ... SELECT per timezone and chunk of users, and
+# NOT EXISTS on today's reminder makes every run idempotent, so the scheduler
+# thread, cron ('flask send-reminders') and several processes can all run it.
+REMINDER_START_HOUR = 9
+REMINDER_END_HOUR = 21
+REMINDER_INTERVAL_SECONDS = 15 * 60
+REMINDER_TITLE = "🌅 Daily Learning Reminder"
+REMINDER_MESSAGES = [
+    "Good morning! Ready to learn some new words today?",
+    "Start your day right with a quick vocabulary session!",
+    "Your Pokémon is waiting for you to learn new words!",
+    "Keep your streak alive - learn something new today!"
+]
+REMINDER_STREAK_MESSAGE = ("You're on a ", "-day streak! Keep it going with today's learning session!")
+
+# Follow-ups: a nudge for users who stopped logging in, and an evening warning
+# for streaks that end at midnight. Re-engagement walks the stale range of
+# the user_acc index on last_login once for all timezones; streak warnings
+# read the evening timezones' users from the timezone index.
+REENGAGEMENT_INACTIVE_DAYS = 7
+REENGAGEMENT_TITLE = "👋 We miss you!"
+REENGAGEMENT_MESSAGE = "Your Pokémon hasn't seen you in a while. Come back and learn a few words today!"
+STREAK_RISK_HOUR = 18
+STREAK_RISK_TITLE = "🔥 Streak at risk!"
+STREAK_RISK_MESSAGE = ("Your ", "-day streak ends at midnight. Learn one word to keep it!")
+
+_reminder_scheduler = None
+_reminder_scheduler_lock = threading.Lock()
+
+
+def player_timezones():
+    """Distinct timezones of non-admin users (None for unset), one seek of ix_user_acc_player_timezone each."""
+    players = db.session.query(UserAcc.timezone).filter(UserAcc.is_admin == False)
+    names = [None] if players.filter(UserAcc.timezone.is_(None)).first() else []
+    
+    name = players.filter(UserAcc.timezone.isnot(None)).order_by(UserAcc.timezone).limit(1).scalar()
+    while name is not None:
+        names.append(name)
+        name = players.filter(UserAcc.timezone > name).order_by(UserAcc.timezone).limit(1).scalar()
+    return names
+
+
+def in_timezones(names):
+    """Filter for users whose timezone is one of names (None matches unset timezones)."""
+    names = list(names)
+    clause = UserAcc.timezone.in_([name for name in names if name is not None])
+    return or_(clause, UserAcc.timezone.is_(None)) if None in names else clause
+
+
+def iter_player_ranges(condition, chunk_size):
+    """Yield WHERE clauses for consecutive user_id ranges of about chunk_size non-admin users matching condition.
+
+    condition should pin one partial user_acc index to a single value (such as
+    a timezone), so every range is an index seek on (value, user_id) and the
+    ranges are found without loading any ids.
+    """
+    players = db.session.query(UserAcc.user_id).filter(UserAcc.is_admin == False, condition)
+    last_id = 0
+    
+    while True:
+        query = players.filter(UserAcc.user_id > last_id).order_by(UserAcc.user_id)
+        first_id = query.limit(1).scalar()
+        if first_id is None:
+            return
+        
+        end_id = query.offset(chunk_size - 1).limit(1).scalar()
+        if end_id is None:
+            end_id = players.order_by(UserAcc.user_id.desc()).limit(1).scalar()
+        
+        yield and_(UserAcc.is_admin == False, condition, UserAcc.user_id.between(first_id, end_id))
+        last_id = end_id
+
+
+def iter_player_id_pages(condition, key, chunk_size):
+    """Yield a user_id IN clause for each page of up to chunk_size non-admin users matching condition, in (key, user_id) order.
+
+    condition should be a selective range of the partial user_acc index on
+    (key, user_id), which covers the ids. A page is at most two seeks of that
+    index, "key = last key and user_id > last id" and then "key > last key",
+    because SQLite only seeks on the first column of a row-value comparison
+    and would rescan large groups of tied keys.
+    """
+    players = db.session.query(key, UserAcc.user_id).filter(UserAcc.is_admin == False, condition)
+    last = None
+    
+    while True:
+        if last is None:
+            rows = players.order_by(key, UserAcc.user_id).limit(chunk_size).all()
+        else:
+            last_key, last_id = last
+            rows = players.filter(key == last_key, UserAcc.user_id > last_id)\
+                .order_by(UserAcc.user_id).limit(chunk_size).all()
+            if len(rows) < chunk_size:
+                # NULLs sort first, so after the NULL group come all non-NULL keys
+                after = key.isnot(None) if last_key is None else key > last_key
+                rows += players.filter(after)\
+                    .order_by(key, UserAcc.user_id).limit(chunk_size - len(rows)).all()
+        if not rows:
+            return
+        
+        yield UserAcc.user_id.in_([user_id for _, user_id in rows])
+        last = tuple(rows[-1])
+
+
+def send_daily_reminders(chunk_size=5000, now=None):
+    """Create today's reminder for every user whose local time is inside the window. Returns how many were created."""
+    now = now or datetime.utcnow()
+    created = 0
+    
+    prefix, suffix = REMINDER_STREAK_MESSAGE
+    message = case(
+        (UserAcc.current_streak > 0, literal(prefix) + cast(UserAcc.current_streak, String) + literal(suffix)),
+        else_=case(
+            *[((UserAcc.user_id + now.toordinal()) % len(REMINDER_MESSAGES) == i, text_)
+              for i, text_ in enumerate(REMINDER_MESSAGES)]
+        )
+    )
     
-    return True
+    for name in player_timezones():
+        tz = resolve_timezone(name)
+        local_now = pytz.utc.localize(now).astimezone(tz)
+        if not REMINDER_START_HOUR <= local_now.hour < REMINDER_END_HOUR:
+            continue
+        
+        today = local_now.date()
+        day_start = tz.localize(datetime.combine(today, datetime.min.time())).astimezone(pytz.utc).replace(tzinfo=None)
+        
+        already_reminded = select(Notification.notification_id).where(
+            Notification.user_id == UserAcc.user_id,
+            Notification.notification_type == 'motivation',
+            Notification.created_at >= day_start
+        ).exists()
+        
+        # Only this timezone's users are read, a range at a time from ix_user_acc_player_timezone
+        for in_range in iter_player_ranges(UserAcc.timezone == name, chunk_size):
+            query = select(
+                UserAcc.user_id, literal(REMINDER_TITLE), message,
+                literal('motivation'), literal(False), literal(now, db.DateTime)
+            ).select_from(UserAcc).outerjoin(
+                UserActivity, UserActivity.user_id == UserAcc.user_id
+            ).where(
+                in_range,
+                UserAcc.is_active == True,
+                func.coalesce(UserActivity.last_active_day, 0) < today.toordinal(),
+                ~already_reminded
+            )
+            result = db.session.execute(
+                Notification.__table__.insert().from_select(
+                    ['user_id', 'title', 'message', 'notification_type', 'is_read', 'created_at'], query
+                )
+            )
+            db.session.commit()
+            created += result.rowcount
+    
+    return created
+
+
+def insert_notifications_for(ranges, filters, title, message, notification_type, already_sent, now):
+    """Insert one notification for every user in ranges matching filters that already_sent does not exclude.
+
+    ranges yields the WHERE clause of each chunk (iter_player_ranges or
+    iter_player_id_pages), and each one becomes a single INSERT ... SELECT,
+    where the other filters are checked, in its own short transaction.
+    """
+    created = 0
+    for in_range in ranges:
+        query = select(
+            UserAcc.user_id, literal(title), message,
+            literal(notification_type), literal(False), literal(now, db.DateTime)
+        ).where(in_range, *filters, ~already_sent)
+        result = db.session.execute(
+            Notification.__table__.insert().from_select(
+                ['user_id', 'title', 'message', 'notification_type', 'is_read', 'created_at'], query
+            )
+        )
+        db.session.commit()
+        created += result.rowcount
+    
+    return created
 
-def start_auto_notifications(user_id):
-    """Start auto notifications but prevent multiple threads"""
-    # Check if auto notifications already exist today
-    today = datetime.now(ph_timezone).date()
-    today_start = datetime.combine(today, datetime.min.time())
+
+def send_reengagement_reminders(inactive_days=REENGAGEMENT_INACTIVE_DAYS, chunk_size=5000, now=None):
+    """Nudge users who have not logged in for inactive_days, at most once per inactive_days."""
+    now = now or datetime.utcnow()
+    # last_login is stored in Philippine time, date_created in UTC
+    login_cutoff = pytz.utc.localize(now).astimezone(ph_timezone).replace(tzinfo=None) - timedelta(days=inactive_days)
+    created_cutoff = now - timedelta(days=inactive_days)
     
-    existing_auto = Notification.query.filter_by(
-        user_id=user_id,
-        notification_type='auto_reminder'
-    ).filter(
-        Notification.created_at >= today_start
-    ).first()
+    already_sent = select(Notification.notification_id).where(
+        Notification.user_id == UserAcc.user_id,
+        Notification.notification_type == 'reengagement',
+        Notification.created_at >= created_cutoff
+    ).exists()
+    
+    window = [
+        name for name in player_timezones()
+        if REMINDER_START_HOUR <= pytz.utc.localize(now).astimezone(resolve_timezone(name)).hour < REMINDER_END_HOUR
+    ]
+    if not window:
+        return 0
+    filters = [UserAcc.is_active == True, in_timezones(window)]
+    
+    # Stale logins and accounts that never logged in (the NULL entries), each paged from ix_user_acc_player_last_login
+    created = insert_notifications_for(
+        iter_player_id_pages(UserAcc.last_login < login_cutoff, UserAcc.last_login, chunk_size), filters,
+        REENGAGEMENT_TITLE, literal(REENGAGEMENT_MESSAGE), 'reengagement', already_sent, now
+    )
+    created += insert_notifications_for(
+        iter_player_id_pages(UserAcc.last_login.is_(None), UserAcc.last_login, chunk_size),
+        filters + [UserAcc.date_created < created_cutoff],
+        REENGAGEMENT_TITLE, literal(REENGAGEMENT_MESSAGE), 'reengagement', already_sent, now
+    )
+    return created
+
+
+def send_streak_risk_reminders(chunk_size=5000, now=None):
+    """Warn users in the evening whose streak is still alive but who have not learned today."""
+    now = now or datetime.utcnow()
+    prefix, suffix = STREAK_RISK_MESSAGE
+    message = literal(prefix) + cast(UserAcc.current_streak, String) + literal(suffix)
+    created = 0
+    
+    for name in player_timezones():
+        tz = resolve_timezone(name)
+        local_now = pytz.utc.localize(now).astimezone(tz)
+        if not STREAK_RISK_HOUR <= local_now.hour < 24:
+            continue
+        
+        today = local_now.date()
+        day_start = tz.localize(datetime.combine(today, datetime.min.time())).astimezone(pytz.utc).replace(tzinfo=None)
+        already_sent = select(Notification.notification_id).where(
+            Notification.user_id == UserAcc.user_id,
+            Notification.notification_type == 'streak_risk',
+            Notification.created_at >= day_start
+        ).exists()
+        # Learned yesterday (streak alive) but not yet today
+        learned_yesterday = select(UserActivity.user_id).where(
+            UserActivity.user_id == UserAcc.user_id,
+            UserActivity.last_active_day == today.toordinal() - 1
+        ).exists()
+        
+        # Live streaks are common, so reading only this timezone's users from
+        # ix_user_acc_player_timezone beats walking ix_user_acc_player_streak
+        created += insert_notifications_for(
+            iter_player_ranges(UserAcc.timezone == name, chunk_size),
+            [UserAcc.current_streak > 0, UserAcc.is_active == True, learned_yesterday],
+            STREAK_RISK_TITLE, message, 'streak_risk', already_sent, now
+        )
+    
+    return created
+
+
+def send_scheduled_notifications(chunk_size=5000, now=None, inactive_days=REENGAGEMENT_INACTIVE_DAYS):
+    """One scheduler pass: daily reminders, re-engagement and streak warnings. Returns counts per kind."""
+    return {
+        'daily': send_daily_reminders(chunk_size, now),
+        'reengagement': send_reengagement_reminders(inactive_days, chunk_size, now),
+        'streak_risk': send_streak_risk_reminders(chunk_size, now),
+    }
+
+
+def reminder_scheduler_loop():
+    last_prune = None
+    while True:
+        try:
+            with app.app_context():
+                sent = send_scheduled_notifications()
+                if any(sent.values()):
+                    print(f"✅ Sent {sent['daily']} daily reminders, {sent['reengagement']} re-engagement "
+                          f"and {sent['streak_risk']} streak warnings")
+                
+                # Freeze the standings of weeks and months that just ended
+                snapshot_closed_periods()
+                
+                # Keep today's and tomorrow's Word of the Day scheduled
+                schedule_words_of_day(datetime.now(ph_timezone).date(), 2)
+                
+                # Retention runs once a day from the same thread
+                if last_prune is None or time.monotonic() - last_prune > 24 * 60 * 60:
+                    report = prune_notifications()
+                    last_prune = time.monotonic()
+                    print(f"✅ Pruned {report['reclaimed']} notifications")
+                db.session.remove()
+        except Exception as e:
+            print(f"ERROR in reminder scheduler: {str(e)}")
+            traceback.print_exc()
+        time.sleep(REMINDER_INTERVAL_SECONDS)
+
+
+def start_auto_notifications():
+    """Start the reminder scheduler thread once per process, if REMINDER_SCHEDULER is set."""
+    global _reminder_scheduler
+    
+    if _reminder_scheduler or not app.config.get('REMINDER_SCHEDULER'):
+        return
     
-    # Only start if no auto notifications exist today
-    if not existing_auto:
-        create_daily_reminder_notification(user_id)
+    with _reminder_scheduler_lock:
+        if _reminder_scheduler:
+            return
+        _reminder_scheduler = threading.Thread(target=reminder_scheduler_loop, name='reminder-scheduler', daemon=True)
+        _reminder_scheduler.start()
+
 
 def create_morning_motivation(user_id, streak_days):
     """Create morning motivation notification"""
-    messages = [
-        "Good morning! Ready to learn some new words today?",
-        "Start your day right with a quick vocabulary session!",
-        "Your Pokémon is waiting for you to learn new words!",
-        "Keep your streak alive - learn something new today!"
-    ]
-    
     if streak_days > 0:
-        message = f"You're on a {streak_days}-day streak! Keep it going with today's learning session!"
+        prefix, suffix = REMINDER_STREAK_MESSAGE
+        message = f"{prefix}{streak_days}{suffix}"
     else:
-        message = random.choice(messages)
+        message = random.choice(REMINDER_MESSAGES)
     
     notification = Notification(
         user_id=user_id,
-        title="🌅 Daily Learning Reminder",
+        title=REMINDER_TITLE,
         message=message,
         notification_type='motivation',
         is_read=False,
-        created_at=datetime.now(ph_timezone)
+        created_at=datetime.utcnow()
     )
     db.session.add(notification)
     db.session.commit()
     return notification
 
-# ---------- NOTIFICATION ROUTES ----------
-@app.route('/api/notifications')
-@login_required
-def get_notifications():
-    """Get notifications for current user"""
-    try:
-        user_id = session.get('user_id')
-        
-        notifications = Notification.query.filter_by(
-            user_id=user_id
-        ).order_by(
-            Notification.created_at.desc()
-        ).limit(20).all()
-        
-        # Format for frontend
-        notifications_data = []
-        for notif in notifications:
-            # Calculate time ago
-            now = datetime.utcnow()
-            
-            if not notif.created_at:
-                time_ago = "Just now"
-            else:
-                diff = now - notif.created_at
-                
-                if diff.days > 0:
-                    time_ago = f"{diff.days}d ago"
-                elif diff.seconds >= 3600:
-                    hours = diff.seconds // 3600
-                    time_ago = f"{hours}h ago"
-                elif diff.seconds >= 60:
-                    minutes = diff.seconds // 60
-                    time_ago = f"{minutes}m ago"
-                else:
-                    time_ago = "Just now"
-            
-            notifications_data.append({
-                'id': notif.notification_id,
-                'title': notif.title,
-                'message': notif.message,
-                'time': time_ago,
-                'unread': not notif.is_read,
-                'type': notif.notification_type,
-                'timestamp': notif.created_at.isoformat() if notif.created_at else None
-            })
-        
-        # **FIX: Return proper JSON with UTF-8 charset**
-        response = jsonify(notifications_data)
-        response.headers['Content-Type'] = 'application/json; charset=utf-8'
-        return response
-        
-    except Exception as e:
-        print(f"ERROR in get_notifications: {str(e)}")
-        traceback.print_exc()
-        # Return empty array with proper headers
-        response = jsonify([])
-        response.headers['Content-Type'] = 'application/json; charset=utf-8'
-        return response
-
-@app.route('/api/notifications/mark_read/<int:notification_id>', methods=['POST'])
-@login_required
-def mark_notification_read(notification_id):
-    """Mark notification as read"""
-    notification = Notification.query.get(notification_id)
+# ---------- NOTIFICATION RETENTION ----------
+# How long each notification type is kept; None is the default for other types.
+NOTIFICATION_RETENTION = {
+    'auto': timedelta(days=7),
+    'auto_reminder': timedelta(days=7),
+    'test': timedelta(days=1),
+    'motivation': timedelta(days=14),
+    'reengagement': timedelta(days=14),
+    'streak_risk': timedelta(days=3),
+    'achievement': timedelta(days=180),
+    'pokemon': timedelta(days=180),
+    None: timedelta(days=90),
+}
+NOTIFICATION_MAX_PER_USER = 200
+
+
+def archive_notifications(ids, archive_path):
+    """Append notifications to a gzip file as JSON lines (each run adds a gzip member)."""
+    rows = db.session.execute(
+        select(Notification.__table__).where(Notification.notification_id.in_(ids))
+    ).mappings().all()
+    with gzip.open(archive_path, 'at', encoding='utf-8') as archive:
+        for row in rows:
+            archive.write(json.dumps(dict(row), default=str, ensure_ascii=False) + '\n')
+
+
+def delete_notifications_in_chunks(id_query, chunk_size, archive_path=None):
+    """Delete (and optionally archive) the ids selected by id_query, one short transaction per chunk."""
+    deleted = 0
+    while True:
+        ids = [notification_id for (notification_id,) in db.session.execute(id_query.limit(chunk_size))]
+        if not ids:
+            return deleted
+        
+        if archive_path:
+            archive_notifications(ids, archive_path)
+        db.session.execute(Notification.__table__.delete().where(Notification.notification_id.in_(ids)))
+        db.session.commit()
+        deleted += len(ids)
+
+
+def prune_notifications(chunk_size=2000, archive_path=None, now=None):
+    """Apply the per-type TTLs and the per-user cap. Returns counts of rows reclaimed."""
+    now = now or datetime.utcnow()
+    # A configured table may leave out None; other types then keep the default TTL
+    retention = {None: NOTIFICATION_RETENTION[None], **app.config.get('NOTIFICATION_RETENTION', NOTIFICATION_RETENTION)}
+    max_per_user = app.config.get('NOTIFICATION_MAX_PER_USER', NOTIFICATION_MAX_PER_USER)
+    started = time.perf_counter()
+    
+    # Expired rows, type by type (served by ix_notification_type_created)
+    expired = 0
+    named_types = [t for t in retention if t is not None]
+    for notification_type, ttl in retention.items():
+        if notification_type is None:
+            type_filter = or_(Notification.notification_type.notin_(named_types), Notification.notification_type.is_(None))
+        else:
+            type_filter = Notification.notification_type == notification_type
+        expired += delete_notifications_in_chunks(
+            select(Notification.notification_id).where(type_filter, Notification.created_at < now - ttl),
+            chunk_size, archive_path
+        )
     
-    if not notification:
-        response = jsonify({'success': False, 'error': 'Notification not found'})
-        response.headers['Content-Type'] = 'application/json; charset=utf-8'
+    # Rows beyond each user's newest max_per_user, one chunk of users at a time
+    over_cap = 0
+    for first_id, last_id in iter_user_id_ranges(chunk_size):
+        ranked = select(
+            Notification.notification_id,
+            func.row_number().over(
+                partition_by=Notification.user_id,
+                order_by=Notification.notification_id.desc()
+            ).label('position')
+        ).where(Notification.user_id.between(first_id, last_id)).subquery()
+        over_cap += delete_notifications_in_chunks(
+            select(ranked.c.notification_id).where(ranked.c.position > max_per_user),
+            chunk_size, archive_path
+        )
+    
+    # Broadcasts past their expiry, or past the default retention when they have none
+    broadcasts = Broadcast.query.filter(or_(
+        Broadcast.expires_at < now,
+        and_(Broadcast.expires_at.is_(None), Broadcast.created_at < now - retention[None])
+    )).delete(synchronize_session=False)
+    db.session.commit()
+    
+    return {
+        'expired': expired,
+        'over_cap': over_cap,
+        'broadcasts': broadcasts,
+        'reclaimed': expired + over_cap,
+        'seconds': time.perf_counter() - started
+    }
+
+
+# ---------- BROADCASTS ----------
+# An announcement to everyone is a single Broadcast row, whatever the number of
+# users. Each user has at most one BroadcastCursor row with two watermarks
+# (read through, cleared through), and feeds merge the live broadcasts into the
+# personal notifications at read time.
+BROADCAST_FEED_LIMIT = 20
+
+
+def get_broadcast_cursor(user_id):
+    """(read_through_id, cleared_through_id) for a user; zeros until they first read or clear."""
+    row = db.session.query(BroadcastCursor.read_through_id, BroadcastCursor.cleared_through_id)\
+        .filter(BroadcastCursor.user_id == user_id).first()
+    return (row.read_through_id, row.cleared_through_id) if row else (0, 0)
+
+
+def visible_broadcasts(cleared_through, now=None):
+    """Live broadcasts newer than a user's clear watermark."""
+    now = now or datetime.utcnow()
+    return Broadcast.query.filter(
+        Broadcast.broadcast_id > cleared_through,
+        or_(Broadcast.expires_at.is_(None), Broadcast.expires_at > now)
+    )
+
+
+def broadcast_state(user_id):
+    """Newest visible broadcast id, visible count and unread count for a user, from one aggregate."""
+    read_through, cleared_through = get_broadcast_cursor(user_id)
+    latest_id, visible, unread = visible_broadcasts(cleared_through).with_entities(
+        func.max(Broadcast.broadcast_id),
+        func.count(Broadcast.broadcast_id),
+        func.sum(case((Broadcast.broadcast_id > read_through, 1), else_=0))
+    ).one()
+    return latest_id or 0, visible, unread or 0
+
+
+def advance_broadcast_cursor(user_id, read_through=0, cleared_through=0):
+    """Move a user's watermarks forward (never back) with one upsert. The caller commits."""
+    stmt = sqlite_insert(BroadcastCursor).values(
+        user_id=user_id,
+        read_through_id=read_through,
+        cleared_through_id=cleared_through
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id'],
+        set_={
+            'read_through_id': func.max(BroadcastCursor.read_through_id, stmt.excluded.read_through_id),
+            'cleared_through_id': func.max(BroadcastCursor.cleared_through_id, stmt.excluded.cleared_through_id),
+        }
+    )
+    db.session.execute(stmt)
+
+
+def serialize_broadcast(broadcast, read_through):
+    """Broadcast in the same shape as a personal notification, with a 'b'-prefixed id."""
+    return {
+        'id': f"b{broadcast.broadcast_id}",
+        'broadcast_id': broadcast.broadcast_id,
+        'broadcast': True,
+        'title': broadcast.title,
+        'message': broadcast.message,
+        'time': notification_time_ago(broadcast.created_at),
+        'unread': broadcast.broadcast_id > read_through,
+        'type': broadcast.notification_type,
+        'timestamp': broadcast.created_at.isoformat() if broadcast.created_at else None
+    }
+
+
+def create_broadcast(title, message, notification_type='announcement', expires_in_days=None, created_by=None):
+    """Announce something to every user with a single insert."""
+    broadcast = Broadcast(
+        title=title[:100],
+        message=message,
+        notification_type=notification_type or 'announcement',
+        created_by=created_by,
+        expires_at=datetime.utcnow() + timedelta(days=expires_in_days) if expires_in_days else None
+    )
+    db.session.add(broadcast)
+    db.session.commit()
+    return broadcast
+
+
+@app.route('/admin/api/broadcasts', methods=['GET', 'POST'])
+@admin_required
+def admin_broadcasts():
+    """List recent broadcasts, or send a new one to every user"""
+    if request.method == 'GET':
+        broadcasts = Broadcast.query.order_by(Broadcast.broadcast_id.desc()).limit(50).all()
+        return jsonify({'success': True, 'broadcasts': [{
+            'broadcast_id': b.broadcast_id,
+            'title': b.title,
+            'message': b.message,
+            'type': b.notification_type,
+            'created_at': b.created_at.isoformat() if b.created_at else None,
+            'expires_at': b.expires_at.isoformat() if b.expires_at else None
+        } for b in broadcasts]})
+    
+    try:
+        data = request.get_json(silent=True) or {}
+        title = str(data.get('title') or '').strip()
+        message = str(data.get('message') or '').strip()
+        if not title or not message:
+            return jsonify({'success': False, 'error': 'Title and message are required'}), 400
+        
+        expires_in_days = data.get('expires_in_days')
+        if expires_in_days is not None and (not isinstance(expires_in_days, int) or expires_in_days <= 0):
+            return jsonify({'success': False, 'error': 'expires_in_days must be a positive integer'}), 400
+        
+        broadcast = create_broadcast(
+            title, message,
+            notification_type=data.get('type'),
+            expires_in_days=expires_in_days,
+            created_by=session.get('user_id')
+        )
+        return jsonify({
+            'success': True,
+            'message': 'Broadcast sent',
+            'broadcast_id': broadcast.broadcast_id
+        })
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error sending broadcast: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/admin/api/broadcasts/<int:broadcast_id>', methods=['DELETE'])
+@admin_required
+def admin_delete_broadcast(broadcast_id):
+    """Withdraw a broadcast from every feed"""
+    try:
+        # Expire rather than delete: it leaves every feed now and the retention sweep removes it later
+        updated = Broadcast.query.filter_by(broadcast_id=broadcast_id)\
+            .update({'expires_at': datetime.utcnow()}, synchronize_session=False)
+        db.session.commit()
+        if not updated:
+            return jsonify({'success': False, 'error': 'Broadcast not found'}), 404
+        return jsonify({'success': True, 'message': 'Broadcast withdrawn'})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+# ---------- NOTIFICATION ROUTES ----------
+def notification_time_ago(created_at):
+    """Short relative time shown next to a notification."""
+    if not created_at:
+        return "Just now"
+    
+    diff = datetime.utcnow() - created_at
+    if diff.days > 0:
+        return f"{diff.days}d ago"
+    elif diff.seconds >= 3600:
+        hours = diff.seconds // 3600
+        return f"{hours}h ago"
+    elif diff.seconds >= 60:
+        minutes = diff.seconds // 60
+        return f"{minutes}m ago"
+    return "Just now"
+
+
+def serialize_notification(notif):
+    """Notification as sent to the dashboard (JSON list and event stream)."""
+    return {
+        'id': notif.notification_id,
+        'title': notif.title,
+        'message': notif.message,
+        'time': notification_time_ago(notif.created_at),
+        'unread': not notif.is_read,
+        'type': notif.notification_type,
+        'timestamp': notif.created_at.isoformat() if notif.created_at else None
+    }
+
+
+def notification_etag(user_id):
+    """Version of a user's feed: newest id, unread count and total of both personal notifications and broadcasts."""
+    latest_id, unread_count, total = db.session.query(
+        func.max(Notification.notification_id),
+        func.sum(case((Notification.is_read == False, 1), else_=0)),
+        func.count(Notification.notification_id)
+    ).filter(Notification.user_id == user_id).one()
+    latest_broadcast_id, broadcasts, unread_broadcasts = broadcast_state(user_id)
+    return f"{latest_id or 0}-{unread_count or 0}-{total}-b{latest_broadcast_id}-{unread_broadcasts}-{broadcasts}"
+
+
+def unread_notification_count(user_id):
+    """Unread personal notifications plus unread broadcasts."""
+    personal = Notification.query.filter_by(user_id=user_id, is_read=False).count()
+    return personal + broadcast_state(user_id)[2]
+
+
+NOTIFICATION_FEED_LIMIT = 20
+
+
+def notification_read_state(user_id, oldest_id, since_id):
+    """[{'id', 'unread'}] for the client's window of personal notifications (oldest_id..since_id) that still exist."""
+    rows = db.session.query(Notification.notification_id, Notification.is_read).filter(
+        Notification.user_id == user_id,
+        Notification.notification_id >= oldest_id,
+        Notification.notification_id <= since_id
+    ).order_by(Notification.notification_id.desc()).limit(NOTIFICATION_FEED_LIMIT).all()
+    return [{'id': notification_id, 'unread': not is_read} for notification_id, is_read in rows]
+
+
+@app.route('/api/notifications')
+@login_required
+def get_notifications():
+    """Get notifications and broadcasts for current user.
+
+    With since_id / since_broadcast_id the response is a delta: the next page
+    of newer rows in ascending id order (has_more says another page follows),
+    plus the current read state of the rows the client already shows, so
+    reads and clears made elsewhere reach it too.
+    """
+    try:
+        user_id = session.get('user_id')
+        since_id = request.args.get('since_id', type=int)
+        since_broadcast_id = request.args.get('since_broadcast_id', type=int)
+        delta = since_id is not None or since_broadcast_id is not None
+        
+        # Nothing new or newly read since the client's copy: answer 304 without loading rows
+        etag = notification_etag(user_id)
+        if etag in request.if_none_match:
+            response = make_response('', 304)
+            response.set_etag(etag)
+            return response
+        
+        read_through, cleared_through = get_broadcast_cursor(user_id)
+        broadcasts = visible_broadcasts(cleared_through)
+        
+        if delta:
+            since_id = since_id or 0
+            since_broadcast_id = since_broadcast_id or 0
+            
+            # Page forward from the client's cursors so no new row is skipped
+            notifications = Notification.query.filter(
+                Notification.user_id == user_id,
+                Notification.notification_id > since_id
+            ).order_by(Notification.notification_id).limit(NOTIFICATION_FEED_LIMIT + 1).all()
+            broadcasts = broadcasts.filter(Broadcast.broadcast_id > since_broadcast_id)\
+                .order_by(Broadcast.broadcast_id).limit(BROADCAST_FEED_LIMIT + 1).all()
+            has_more = len(notifications) > NOTIFICATION_FEED_LIMIT or len(broadcasts) > BROADCAST_FEED_LIMIT
+            
+            oldest_id = request.args.get('oldest_id', since_id, type=int)
+            payload = {
+                'notifications': [serialize_notification(notif) for notif in notifications[:NOTIFICATION_FEED_LIMIT]]
+                                 + [serialize_broadcast(b, read_through) for b in broadcasts[:BROADCAST_FEED_LIMIT]],
+                'has_more': has_more,
+                'read_state': notification_read_state(user_id, oldest_id, since_id) if since_id else [],
+                'broadcast_read_through': read_through,
+                'broadcast_cleared_through': cleared_through
+            }
+        else:
+            notifications = Notification.query.filter_by(user_id=user_id)\
+                .order_by(Notification.created_at.desc()).limit(NOTIFICATION_FEED_LIMIT).all()
+            broadcasts = broadcasts.order_by(Broadcast.broadcast_id.desc()).limit(BROADCAST_FEED_LIMIT).all()
+            
+            # Format for frontend, newest first across both sources
+            notifications_data = [serialize_notification(notif) for notif in notifications]
+            if broadcasts:
+                notifications_data += [serialize_broadcast(b, read_through) for b in broadcasts]
+                notifications_data.sort(key=lambda n: n['timestamp'] or '', reverse=True)
+                notifications_data = notifications_data[:NOTIFICATION_FEED_LIMIT]
+            payload = {'notifications': notifications_data, 'has_more': False}
+        
+        # **FIX: Return proper JSON with UTF-8 charset**
+        response = jsonify(payload)
+        response.headers['Content-Type'] = 'application/json; charset=utf-8'
+        response.headers['Cache-Control'] = 'no-cache'
+        response.set_etag(etag)
+        return response
+        
+    except Exception as e:
+        print(f"ERROR in get_notifications: {str(e)}")
+        traceback.print_exc()
+        # Return an empty feed with proper headers
+        response = jsonify({'notifications': [], 'has_more': False})
+        response.headers['Content-Type'] = 'application/json; charset=utf-8'
+        return response
+
+@app.route('/api/notifications/unread_count')
+@login_required
+def get_unread_notification_count():
+    """Unread notification count for the badge"""
+    unread_count = unread_notification_count(session.get('user_id'))
+    
+    response = jsonify({'success': True, 'unread_count': unread_count})
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+# ---------- NOTIFICATION STREAM ----------
+# Dashboards hold one Server-Sent Events connection instead of polling. A single
+# broker thread checks for new notification ids once per second and wakes only
+# the streams of users who got one; idle streams just wait on their queue and
+# send a heartbeat. Streams end after a few minutes and the browser reconnects
+# with Last-Event-ID, so no connection is held forever. Under a gevent/eventlet
+# worker those waits are green threads rather than OS threads.
+NOTIFICATION_BROKER_POLL_SECONDS = 1
+NOTIFICATION_STREAM_HEARTBEAT_SECONDS = 15
+NOTIFICATION_STREAM_MAX_SECONDS = 300
+NOTIFICATION_STREAM_MAX_CLIENTS = 500
+NOTIFICATION_STREAM_BATCH_SIZE = 50
+
+
+class NotificationBroker:
+    """Fans "user X has new notifications" out to that user's open streams."""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = {}  # user_id -> set of queues
+        self.client_count = 0
+        self.last_id = None
+        self.last_broadcast_id = None
+        self.thread = None
+    
+    def is_full(self):
+        return self.client_count >= app.config.get('NOTIFICATION_STREAM_MAX_CLIENTS', NOTIFICATION_STREAM_MAX_CLIENTS)
+    
+    def subscribe(self, user_id):
+        with self.lock:
+            if self.is_full():
+                return None
+            wakeup = queue.Queue(maxsize=1)
+            self.subscribers.setdefault(user_id, set()).add(wakeup)
+            self.client_count += 1
+            
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name='notification-broker', daemon=True)
+                self.thread.start()
+        return wakeup
+    
+    def unsubscribe(self, user_id, wakeup):
+        with self.lock:
+            queues = self.subscribers.get(user_id)
+            if queues and wakeup in queues:
+                queues.discard(wakeup)
+                self.client_count -= 1
+                if not queues:
+                    del self.subscribers[user_id]
+    
+    def publish(self, user_ids=None):
+        """Wake the streams of user_ids, or every stream when None (a broadcast)."""
+        with self.lock:
+            if user_ids is None:
+                queues = [q for user_queues in self.subscribers.values() for q in user_queues]
+            else:
+                queues = [q for user_id in user_ids for q in self.subscribers.get(user_id, ())]
+        for wakeup in queues:
+            try:
+                wakeup.put_nowait(True)
+            except queue.Full:
+                pass  # Already woken, the stream will read everything new
+    
+    def poll(self):
+        """One check for notifications and broadcasts created since the last poll."""
+        latest_broadcast_id = db.session.query(func.max(Broadcast.broadcast_id)).scalar() or 0
+        if self.last_id is None:
+            self.last_id = db.session.query(func.max(Notification.notification_id)).scalar() or 0
+            self.last_broadcast_id = latest_broadcast_id
+            return
+        
+        if latest_broadcast_id > self.last_broadcast_id:
+            self.last_broadcast_id = latest_broadcast_id
+            self.publish()
+        
+        rows = db.session.query(Notification.notification_id, Notification.user_id)\
+            .filter(Notification.notification_id > self.last_id)\
+            .all()
+        if rows:
+            self.last_id = max(notification_id for notification_id, _ in rows)
+            self.publish({user_id for _, user_id in rows})
+    
+    def run(self):
+        while True:
+            try:
+                with app.app_context():
+                    self.poll()
+                    db.session.remove()
+            except Exception as e:
+                print(f"Notification broker error: {e}")
+            time.sleep(NOTIFICATION_BROKER_POLL_SECONDS)
+
+
+notification_broker = NotificationBroker()
+
+
+def notification_events(user_id, last_id, last_broadcast_id):
+    """SSE events for the next batch of the user's notifications and broadcasts newer than the two ids.
+
+    Returns (events, last_id, last_broadcast_id, caught_up). Event ids carry
+    both positions ("<notification id>-<broadcast id>") so a reconnect with
+    Last-Event-ID resumes both.
+    """
+    notifications = Notification.query.filter(
+        Notification.user_id == user_id,
+        Notification.notification_id > last_id
+    ).order_by(Notification.notification_id).limit(NOTIFICATION_STREAM_BATCH_SIZE).all()
+    
+    read_through, cleared_through = get_broadcast_cursor(user_id)
+    broadcasts = visible_broadcasts(max(cleared_through, last_broadcast_id))\
+        .order_by(Broadcast.broadcast_id).limit(NOTIFICATION_STREAM_BATCH_SIZE).all()
+    caught_up = len(notifications) < NOTIFICATION_STREAM_BATCH_SIZE and len(broadcasts) < NOTIFICATION_STREAM_BATCH_SIZE
+    
+    events = []
+    for notif in notifications:
+        last_id = notif.notification_id
+        data = json.dumps(serialize_notification(notif), ensure_ascii=False)
+        events.append(f"id: {last_id}-{last_broadcast_id}\nevent: notification\ndata: {data}\n\n")
+    for broadcast in broadcasts:
+        last_broadcast_id = broadcast.broadcast_id
+        data = json.dumps(serialize_broadcast(broadcast, read_through), ensure_ascii=False)
+        events.append(f"id: {last_id}-{last_broadcast_id}\nevent: notification\ndata: {data}\n\n")
+    
+    # Do not hold a read transaction (and the SQLite lock) while the stream waits
+    db.session.close()
+    return events, last_id, last_broadcast_id, caught_up
+
+
+@app.route('/api/notifications/stream')
+@login_required
+def notification_stream():
+    """Push new notifications as Server-Sent Events"""
+    user_id = session.get('user_id')
+    
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_id') or ''
+    match = re.fullmatch(r'(\d+)(?:-(\d+))?', last_event_id)
+    if match:
+        last_id = int(match.group(1))
+        last_broadcast_id = int(match.group(2) or 0)
+    else:
+        # A fresh page already loaded the list, so only newer notifications are sent
+        last_id = db.session.query(func.max(Notification.notification_id))\
+            .filter(Notification.user_id == user_id).scalar() or 0
+        last_broadcast_id = db.session.query(func.max(Broadcast.broadcast_id)).scalar() or 0
+        db.session.close()
+    
+    if notification_broker.is_full():
+        # Too many open streams: the dashboard falls back to polling
+        return jsonify({'success': False, 'error': 'Too many open streams'}), 503
+    
+    def generate(last_id, last_broadcast_id):
+        # Subscribe only once the response is being sent, so a response that is
+        # never iterated does not hold a slot. If the last slot went in the
+        # meantime the stream just ends and the browser's retry gets the 503.
+        wakeup = notification_broker.subscribe(user_id)
+        if wakeup is None:
+            return
+        
+        try:
+            yield "retry: 5000\n\n"
+            
+            caught_up = False
+            while not caught_up:
+                events, last_id, last_broadcast_id, caught_up = notification_events(user_id, last_id, last_broadcast_id)
+                yield from events
+            
+            deadline = time.monotonic() + NOTIFICATION_STREAM_MAX_SECONDS
+            while time.monotonic() < deadline:
+                try:
+                    wakeup.get(timeout=NOTIFICATION_STREAM_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ": heartbeat\n\n"
+                    continue
+                
+                # A burst can be more than one batch, so read until caught up
+                caught_up = False
+                while not caught_up:
+                    events, last_id, last_broadcast_id, caught_up = notification_events(user_id, last_id, last_broadcast_id)
+                    yield from events
+        finally:
+            notification_broker.unsubscribe(user_id, wakeup)
+    
+    response = Response(stream_with_context(generate(last_id, last_broadcast_id)), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@app.route('/api/notifications/mark_read/<int:notification_id>', methods=['POST'])
+@login_required
+def mark_notification_read(notification_id):
+    """Mark notification as read"""
+    notification = Notification.query.get(notification_id)
+    
+    if not notification:
+        response = jsonify({'success': False, 'error': 'Notification not found'})
+        response.headers['Content-Type'] = 'application/json; charset=utf-8'
         return response, 404
     
     if notification.user_id != session.get('user_id'):
@@ -1264,6 +2361,52 @@ def mark_notification_read(notification_id):
     response.headers['Content-Type'] = 'application/json; charset=utf-8'
     return response
 
+MARK_READ_MAX_IDS = 500
+
+
+@app.route('/api/notifications/mark_read', methods=['POST'])
+@login_required
+def mark_notifications_read():
+    """Mark many notifications read in one UPDATE: a list of ids, or everything up to before_id.
+
+    broadcast_through moves the user's broadcast read watermark instead.
+    """
+    user_id = session.get('user_id')
+    data = request.get_json(silent=True) or {}
+    ids = data.get('ids')
+    before_id = data.get('before_id')
+    broadcast_through = data.get('broadcast_through')
+    
+    query = Notification.query.filter(
+        Notification.user_id == user_id,
+        Notification.is_read == False
+    )
+    if ids is not None:
+        if not isinstance(ids, list) or len(ids) > MARK_READ_MAX_IDS or not all(isinstance(i, int) for i in ids):
+            return jsonify({'success': False, 'error': f'ids must be a list of at most {MARK_READ_MAX_IDS} integers'}), 400
+        query = query.filter(Notification.notification_id.in_(ids))
+    elif isinstance(before_id, int):
+        query = query.filter(Notification.notification_id <= before_id)
+    else:
+        query = None
+    
+    if broadcast_through is not None and not isinstance(broadcast_through, int):
+        return jsonify({'success': False, 'error': 'broadcast_through must be an integer'}), 400
+    if query is None and broadcast_through is None:
+        return jsonify({'success': False, 'error': 'Provide ids, before_id or broadcast_through'}), 400
+    
+    try:
+        updated = query.update({'is_read': True}, synchronize_session=False) if query is not None else 0
+        if broadcast_through:
+            advance_broadcast_cursor(user_id, read_through=broadcast_through)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+    
+    return jsonify({'success': True, 'updated': updated, 'unread_count': unread_notification_count(user_id)})
+
+
 @app.route('/api/notifications/clear_all', methods=['POST'])
 @login_required
 def clear_all_notifications():
@@ -1272,6 +2415,9 @@ def clear_all_notifications():
     
     try:
         Notification.query.filter_by(user_id=user_id).delete()
+        latest_broadcast_id = db.session.query(func.max(Broadcast.broadcast_id)).scalar() or 0
+        if latest_broadcast_id:
+            advance_broadcast_cursor(user_id, latest_broadcast_id, latest_broadcast_id)
         db.session.commit()
         response = jsonify({'success': True, 'message': 'All notifications cleared'})
         response.headers['Content-Type'] = 'application/json; charset=utf-8'
@@ -1282,29 +2428,57 @@ def clear_all_notifications():
         response.headers['Content-Type'] = 'application/json; charset=utf-8'
         return response, 500
     
+AUTO_NOTIFICATION_MIN_INTERVAL = timedelta(hours=1)
+
+
 @app.route('/api/create_auto_notification', methods=['POST'])
 @login_required
 def create_auto_notification():
-    """Create an auto-notification from frontend"""
+    """Create an auto-notification from frontend - at most one per hour, repeats return the existing one"""
     user = get_current_user()
     
-    data = request.json
-    title = data.get('title', 'VocabuLearner Update')
-    message = data.get('message', 'Time to learn!')
+    data = request.get_json(silent=True) or {}
+    title = str(data.get('title') or 'VocabuLearner Update')[:100]
+    message = str(data.get('message') or 'Time to learn!')[:500]
     
-    notification = Notification(
-        user_id=user.user_id,
-        title=title,
-        message=message,
-        notification_type='auto',
-        is_read=False,
-        created_at=datetime.utcnow()
+    now = datetime.utcnow()
+    recent = select(Notification.notification_id).where(
+        Notification.user_id == user.user_id,
+        Notification.notification_type == 'auto',
+        Notification.created_at >= now - AUTO_NOTIFICATION_MIN_INTERVAL
+    )
+    
+    # Check and insert in one statement so concurrent calls cannot both create one
+    result = db.session.execute(
+        Notification.__table__.insert().from_select(
+            ['user_id', 'title', 'message', 'notification_type', 'is_read', 'created_at'],
+            select(
+                literal(user.user_id), literal(title), literal(message),
+                literal('auto'), literal(False), literal(now, db.DateTime)
+            ).where(~recent.exists())
+        )
     )
-    db.session.add(notification)
     db.session.commit()
     
+    notification = Notification.query.filter_by(
+        user_id=user.user_id,
+        notification_type='auto'
+    ).order_by(Notification.notification_id.desc()).first()
+    
+    if not result.rowcount:
+        retry_after = notification.created_at + AUTO_NOTIFICATION_MIN_INTERVAL - now
+        response = jsonify({
+            'success': True,
+            'created': False,
+            'message': 'An auto-notification was already sent recently',
+            'notification_id': notification.notification_id
+        })
+        response.headers['Retry-After'] = str(max(int(retry_after.total_seconds()), 1))
+        return response
+    
     return jsonify({
         'success': True, 
+        'created': True,
         'message': 'Auto-notification created',
         'notification_id': notification.notification_id
     })
@@ -1316,8 +2490,8 @@ def dashboard():
     user = get_current_user()
     showStarterModal = user.pokemon_id is None
     
-    # Get Pokémon from database - CHANGED: Get common Pokémon for starters
-    pokemons = Pokemon.query.filter_by(rarity='starter').all()
+    # Get Pokémon from the catalog - CHANGED: Get common Pokémon for starters
+    pokemons = get_catalog().pokemon_by_rarity.get('starter', ())
     pokemons_list = []
     for p in pokemons:
         pokemons_list.append({
@@ -1366,7 +2540,7 @@ def dashboard():
             'word': word_of_day.word,
             'definition': word_of_day.definition,
             'example': word_of_day.example_sentence,
-            'type': word_of_day.category if word_of_day.category else 'General',
+            'type': word_of_day.part_of_speech or word_of_day.category or 'General',
             'user_has_word': user_has_word,
             'points_value': word_of_day.points_value  # Add this line
         }
@@ -1384,60 +2558,14 @@ def dashboard():
         }
     
     # --- Calculate user rank ---
-    # Get all non-admin users ordered by total_points (descending)
-    users = UserAcc.query.filter_by(is_admin=False).order_by(UserAcc.total_points.desc(), UserAcc.name).all()
+    board = get_leaderboard()
+    user_rank = board.rank(user.user_id)
     
-    # Find user's rank
-    user_rank = None
-    for rank, u in enumerate(users, start=1):
-        if u.user_id == user.user_id:
-            user_rank = rank
-            break
-    
-    # If user is admin or not found in ranking, show appropriate rank
+    # If user is admin, show the position after every ranked user
     if user_rank is None:
-        user_rank = len(users) + 1  # User is admin, so they're not in the ranking
-    
-    # --- CREATE ENGAGING NOTIFICATION ---
-    # Create more engaging notifications with variety
-    import random
-    notification_messages = [
-        "📚 Time to learn new words! Your vocabulary journey continues.",
-        "🌟 Great work! Keep building your word collection.",
-        "⏰ Daily practice makes perfect! Review your words today.",
-        "🎯 New challenges await! Test your vocabulary skills.",
-        "🔥 Your learning streak is impressive! Don't stop now.",
-        "💡 Did you know? Learning 10 new words a week boosts language skills by 40%.",
-        "✨ Your Pokémon partner is proud of your progress!",
-        "📖 A new word of the day is waiting for you!",
-        "🏆 You're climbing the leaderboard! Keep going!",
-        "🧠 Strengthen your memory with a quick review session."
-    ]
-    
-    # Create notification only once per hour to avoid spam
-    last_notification = Notification.query.filter_by(
-        user_id=user.user_id,
-        notification_type='auto'
-    ).order_by(Notification.created_at.desc()).first()
+        user_rank = len(board) + 1
     
-    should_create_notification = True
-    if last_notification and last_notification.created_at:
-        time_since_last = datetime.utcnow() - last_notification.created_at
-        if time_since_last.total_seconds() < 3600:  # Less than 1 hour
-            should_create_notification = False
-    
-    if should_create_notification:
-        notification = Notification(
-            user_id=user.user_id,
-            title="VocabuLearner Reminder",
-            message=random.choice(notification_messages),
-            notification_type='auto',
-            is_read=False,
-            created_at=datetime.utcnow()
-        )
-        db.session.add(notification)
-        db.session.commit()
-        print(f"✅ Created auto notification for user {user.user_id}")
+    # Reminders are generated by the server-side scheduler (see REMINDER SCHEDULER)
     
     # Check for flash messages to show claim notice
     # This will be handled by the add_to_collection route
@@ -1477,6 +2605,8 @@ def add_to_collection(word_id):
         user_word = UserWords(user_id=user.user_id, word_id=word_id, date_learned=ph_time)
         db.session.add(user_word)
         user.total_points = (user.total_points or 0) + word.points_value
+        bump_user_stats(user.user_id, words_learned=1, exp_earned=word.points_value)
+        record_learning_activity(user)
         
         # Check if this is a Word of the Day
         if word.is_word_of_day:
@@ -1485,38 +2615,103 @@ def add_to_collection(word_id):
             flash(f"Word '{word.word}' added to your collection! +{word.points_value} EXP", 'success')
         
         db.session.commit()
+        update_leaderboard(user, words_learned=1)
         
         # CHECK ACHIEVEMENTS AFTER LEARNING A WORD
-        check_and_update_achievements(user)
+        enqueue_user_evaluation(user.user_id)
         
     else:
         flash(f"Word '{word.word}' is already in your collection!", 'info')
     
     return redirect(url_for('dashboard'))
 
-def get_daily_word_of_day():
-    """Get a consistent Word of the Day for the current day in Philippine Time."""
-    # Get Philippine Time
-    ph_tz = pytz.timezone('Asia/Manila')
-    ph_time = datetime.now(ph_tz)
-    today_ph = ph_time.date()
-    
-    today_str = today_ph.strftime('%Y-%m-%d')
+# ---------- WORD OF THE DAY SCHEDULE ----------
+# Each Philippine date gets one row in word_of_day_schedule, written ahead of
+# time by 'flask schedule-words-of-day' or the reminder scheduler. Once written
+# the pick never changes, even if candidates are added later that day. Pages
+# never write it: an unscheduled day shows the same hash pick, uncached.
+_word_of_day_cache = {}
+
 
+def pick_word_of_day(day, exclude_user_id=None):
+    """Pick a word for a date by hashing the date over candidate ids, without loading the candidates."""
+    candidates = Vocabulary.query.filter_by(is_word_of_day=True)
+    if candidates.first() is None:
+        # If no words are marked as Word of Day, any word will do
+        candidates = Vocabulary.query
     
-    # Create a hash based on today's Philippine date
-    date_hash = hashlib.md5(today_str.encode()).hexdigest()
-    hash_int = int(date_hash, 16)
+    if exclude_user_id:
+        candidates = candidates.filter(~user_has_word(exclude_user_id))
     
-    # Get all Word of Day candidates
-    word_of_day_candidates = Vocabulary.query.filter_by(is_word_of_day=True).all()
+    count = candidates.count()
+    if not count:
+        return None
     
-    if not word_of_day_candidates:
+    # Create a hash based on the date for consistent selection
+    date_hash = hashlib.md5(day.strftime('%Y-%m-%d').encode()).hexdigest()
+    word_index = int(date_hash, 16) % count
+    return candidates.order_by(Vocabulary.word_id).offset(word_index).first()
+
+
+def schedule_word_of_day(day):
+    """Write the pick for a date unless one exists, and return the scheduled word id. The caller commits."""
+    word = pick_word_of_day(day)
+    if word is None:
         return None
     
-    # Select word based on hash (consistent for the day)
-    word_index = hash_int % len(word_of_day_candidates)
-    return word_of_day_candidates[word_index]
+    stmt = sqlite_insert(WordOfDaySchedule).values(date=day, word_id=word.word_id)
+    db.session.execute(stmt.on_conflict_do_nothing(index_elements=['date']))
+    
+    return db.session.query(WordOfDaySchedule.word_id).filter_by(date=day).scalar()
+
+
+def schedule_words_of_day(start, days):
+    """Schedule days dates from start in one transaction. Returns False if there are no words to schedule."""
+    for offset in range(days):
+        if schedule_word_of_day(start + timedelta(days=offset)) is None:
+            db.session.rollback()
+            return False
+    db.session.commit()
+    return True
+
+
+def get_scheduled_word_id(day):
+    """Scheduled word id for a date, cached per process. Read-only: unscheduled days fall back to the pick."""
+    word_id = _word_of_day_cache.get(day)
+    if word_id is None:
+        word_id = db.session.query(WordOfDaySchedule.word_id).filter_by(date=day).scalar()
+        if word_id is None:
+            word = pick_word_of_day(day)
+            return word.word_id if word else None
+        
+        # Only a few days are ever requested, so the cache just needs a bound
+        if len(_word_of_day_cache) > 31:
+            _word_of_day_cache.clear()
+        _word_of_day_cache[day] = word_id
+    return word_id
+
+
+def get_daily_word_of_day():
+    """Get a consistent Word of the Day for the current day in Philippine Time."""
+    today_ph = datetime.now(ph_timezone).date()
+    
+    word_id = get_scheduled_word_id(today_ph)
+    if word_id is None:
+        return None
+    return Vocabulary.query.get(word_id)
+
+def user_has_word(user_id):
+    """EXISTS clause for "user_id has learned this Vocabulary row", served by ix_user_words_user_word."""
+    return select(UserWords.user_word_id).where(
+        UserWords.user_id == user_id,
+        UserWords.word_id == Vocabulary.word_id
+    ).exists()
+
+
+def sample_unlearned_words(user_id, limit):
+    """Random words the user hasn't learned yet; the anti-join, sampling and limit all run in SQLite."""
+    return Vocabulary.query.filter(~user_has_word(user_id)).order_by(func.random()).limit(limit).all()
+
 
 @app.route('/api/get_vocabulary_for_review')
 @login_required
@@ -1524,15 +2719,8 @@ def get_vocabulary_for_review():
     user = get_current_user()
     
     try:
-        # Get words that the user has already learned
-        user_learned_word_ids = [word.word_id for word in UserWords.query.filter_by(user_id=user.user_id).all()]
-        
-        # If user has learned words, get words they haven't learned yet
-        # Otherwise, get all words
-        if user_learned_word_ids:
-            words = Vocabulary.query.filter(~Vocabulary.word_id.in_(user_learned_word_ids)).all()
-        else:
-            words = Vocabulary.query.all()
+        # Get 10 random words the user hasn't learned yet for the flashcard game
+        words = sample_unlearned_words(user.user_id, 10)
         
         # Convert to list of dictionaries
         words_list = []
@@ -1546,13 +2734,6 @@ def get_vocabulary_for_review():
                 'points_value': word.points_value
             })
         
-        # Shuffle the words
-        import random
-        random.shuffle(words_list)
-        
-        # Limit to 10 words for the flashcard game
-        words_list = words_list[:10]
-        
         return jsonify({
             'success': True,
             'words': words_list,
@@ -1577,14 +2758,14 @@ def add_review_exp():
         
         # Update user's total points
         user.total_points = (user.total_points or 0) + exp_earned
-        
-        # Check for Pokémon evolution (optional)
-        check_and_update_pokemon_evolution(user)
-        
-        # CHECK ACHIEVEMENTS AFTER EARNING POINTS (for Solo Leveling)
-        check_and_update_achievements(user)
+        bump_user_stats(user.user_id, exp_earned=exp_earned, sessions_completed=1)
+        record_learning_activity(user)
         
         db.session.commit()
+        update_leaderboard(user)
+        
+        # CHECK ACHIEVEMENTS AND EVOLUTION AFTER EARNING POINTS (for Solo Leveling)
+        enqueue_user_evaluation(user.user_id)
         
         return jsonify({
             'success': True,
@@ -1638,92 +2819,1063 @@ def choose_partner():
     )
     db.session.add(user_pokemon)
     
-    # 2. Set as active partner in UserAcc
-    user.pokemon_id = chosen_id
-    user.pokemon_name = pokemon.name  # Default name
+    # 2. Set as active partner in UserAcc
+    user.pokemon_id = chosen_id
+    user.pokemon_name = pokemon.name  # Default name
+    
+    # Create notification
+    notification = Notification(
+        user_id=user.user_id,
+        title='New Partner!',
+        message=f'{pokemon.name} is now your learning partner! ⚡',
+        notification_type='pokemon'
+    )
+    db.session.add(notification)
+    
+    db.session.commit()
+   
+    flash(f"{pokemon.name} is now your starter Pokémon! ⚡", "success")
+    return redirect(url_for('dashboard'))
+
+
+# ---------- IN-MEMORY LEADERBOARD ----------
+# Leaderboard order is points (high first), then name, then user id. Each
+# process keeps every ranked user in a blocked sorted list in that order, so
+# top-N, rank and neighbours cost O(log n); every page and API that shows a
+# rank reads it from here. Routes that
+# change points, names or avatars apply the change right after their commit
+# and record it in a bounded change log; a background reload every few minutes
+# picks up writes from other processes and admin edits, and replays the log
+# entries made while it was loading before swapping the new board in.
+LEADERBOARD_RECONCILE_SECONDS = 300
+LEADERBOARD_CHANGE_LOG_SIZE = 10000
+
+
+class LeaderboardEntry:
+    __slots__ = ('user_id', 'name', 'profile_picture', 'points', 'words')
+
+    def __init__(self, user_id, name, profile_picture, points, words):
+        self.user_id = user_id
+        self.name = name
+        self.profile_picture = profile_picture
+        self.points = points or 0
+        self.words = words or 0
+
+    @property
+    def sort_key(self):
+        return (-self.points, self.name, self.user_id)
+
+
+class SortedKeyList:
+    """Sorted keys in blocks of at most 2 * load, with a Fenwick tree of block sizes.
+
+    bisect.insort on one list moves every later key; here an update shifts a
+    single block and positions are summed from the tree, so add, remove,
+    bisect and slicing cost O(log n + load).
+    """
+    
+    def __init__(self, keys=(), load=1000):
+        self.load = load
+        keys = sorted(keys)
+        self.blocks = [keys[i:i + load] for i in range(0, len(keys), load)]
+        self._reindex()
+    
+    def __len__(self):
+        return self.size
+    
+    def _reindex(self):
+        """Rebuild the block maxima and the tree after blocks were split or dropped."""
+        self.maxes = [block[-1] for block in self.blocks]
+        self.tree = [0] + [len(block) for block in self.blocks]
+        for i in range(1, len(self.tree)):
+            parent = i + (i & -i)
+            if parent < len(self.tree):
+                self.tree[parent] += self.tree[i]
+        self.size = sum(len(block) for block in self.blocks)
+    
+    def _grow(self, block_index, delta):
+        i = block_index + 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+        self.size += delta
+    
+    def _offset(self, block_index):
+        """Number of keys in the blocks before block_index."""
+        total, i = 0, block_index
+        while i:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+    
+    def _locate(self, position):
+        """(block index, index in block) of the key at position."""
+        block_index, step = 0, 1 << (len(self.tree).bit_length() - 1)
+        while step:
+            if block_index + step < len(self.tree) and self.tree[block_index + step] <= position:
+                block_index += step
+                position -= self.tree[block_index]
+            step >>= 1
+        return block_index, position
+    
+    def add(self, key):
+        if not self.blocks:
+            self.blocks.append([key])
+            self._reindex()
+            return
+        
+        block_index = min(bisect.bisect_left(self.maxes, key), len(self.blocks) - 1)
+        block = self.blocks[block_index]
+        bisect.insort(block, key)
+        if len(block) > 2 * self.load:
+            self.blocks[block_index:block_index + 1] = [block[:self.load], block[self.load:]]
+            self._reindex()
+        else:
+            self.maxes[block_index] = block[-1]
+            self._grow(block_index, 1)
+    
+    def remove(self, key):
+        """Remove a key that is in the list."""
+        block_index = bisect.bisect_left(self.maxes, key)
+        block = self.blocks[block_index]
+        del block[bisect.bisect_left(block, key)]
+        if not block:
+            del self.blocks[block_index]
+            self._reindex()
+        else:
+            self.maxes[block_index] = block[-1]
+            self._grow(block_index, -1)
+    
+    def bisect_left(self, key):
+        block_index = bisect.bisect_left(self.maxes, key)
+        if block_index == len(self.blocks):
+            return self.size
+        return self._offset(block_index) + bisect.bisect_left(self.blocks[block_index], key)
+    
+    def bisect_right(self, key):
+        block_index = bisect.bisect_right(self.maxes, key)
+        if block_index == len(self.blocks):
+            return self.size
+        return self._offset(block_index) + bisect.bisect_right(self.blocks[block_index], key)
+    
+    def slice(self, start, stop):
+        """Keys at positions start .. stop - 1."""
+        count = min(stop, self.size) - start
+        if count <= 0:
+            return []
+        
+        block_index, index = self._locate(start)
+        keys = []
+        while len(keys) < count:
+            keys.extend(self.blocks[block_index][index:index + count - len(keys)])
+            block_index, index = block_index + 1, 0
+        return keys
+
+
+class Leaderboard:
+    """Ranked users in a SortedKeyList of sort keys plus a user_id -> entry map."""
+    
+    def __init__(self, entries):
+        self.lock = threading.Lock()
+        self.entries = {entry.user_id: entry for entry in entries}
+        self.keys = SortedKeyList(entry.sort_key for entry in self.entries.values())
+        self.loaded_at = time.monotonic()
+    
+    def __len__(self):
+        return len(self.keys)
+    
+    def _remove(self, user_id):
+        entry = self.entries.pop(user_id, None)
+        if entry is not None:
+            self.keys.remove(entry.sort_key)
+        return entry
+    
+    def put(self, entry):
+        with self.lock:
+            self._remove(entry.user_id)
+            self.entries[entry.user_id] = entry
+            self.keys.add(entry.sort_key)
+    
+    def remove(self, user_id):
+        with self.lock:
+            self._remove(user_id)
+    
+    def get(self, user_id):
+        return self.entries.get(user_id)
+    
+    def rank(self, user_id):
+        """1-based position of a user, or None if they are not ranked."""
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None:
+                return None
+            return self.keys.bisect_left(entry.sort_key) + 1
+    
+    def page(self, offset, limit):
+        """(rank, entry) pairs for ranks offset+1 .. offset+limit."""
+        with self.lock:
+            keys = self.keys.slice(offset, offset + limit)
+            return [(offset + i + 1, self.entries[key[2]]) for i, key in enumerate(keys)]
+    
+    def top(self, n):
+        return self.page(0, n)
+    
+    def after(self, sort_key, limit):
+        """(rank, entry) pairs for the users placed after sort_key (keyset pagination)."""
+        with self.lock:
+            offset = self.keys.bisect_right(sort_key)
+        return self.page(offset, limit)
+    
+    def around(self, user_id, radius=2):
+        """(rank, entry) pairs for the user and up to radius neighbours on each side."""
+        rank = self.rank(user_id)
+        if rank is None:
+            return []
+        start = max(rank - 1 - radius, 0)
+        return self.page(start, rank - 1 - start + radius + 1)
+
+
+_leaderboard = None
+_leaderboard_lock = threading.Lock()
+_leaderboard_loaded = threading.Condition(_leaderboard_lock)
+_leaderboard_loading = False
+_leaderboard_reloading = False
+# (sequence, user_id) of recent changes, for a reload in progress to replay
+_leaderboard_changes = deque(maxlen=LEADERBOARD_CHANGE_LOG_SIZE)
+_leaderboard_sequence = 0
+
+
+def load_leaderboard_entries(user_ids=None):
+    """Leaderboard entries from the database; word counts come from user_stats."""
+    query = db.session.query(
+        UserAcc.user_id, UserAcc.name, UserAcc.profile_picture, UserAcc.total_points,
+        func.coalesce(UserStats.words_learned, 0)
+    ).outerjoin(UserStats, UserStats.user_id == UserAcc.user_id).filter(UserAcc.is_admin == False)
+    if user_ids is not None:
+        query = query.filter(UserAcc.user_id.in_(user_ids))
+    return [LeaderboardEntry(*row) for row in query]
+
+
+def log_leaderboard_change(user_id):
+    """Record a change applied in this process. Call with _leaderboard_lock held."""
+    global _leaderboard_sequence
+    _leaderboard_sequence += 1
+    _leaderboard_changes.append((_leaderboard_sequence, user_id))
+
+
+def reload_leaderboard():
+    """Rebuild the leaderboard from the database and swap it in."""
+    global _leaderboard
+    with _leaderboard_lock:
+        started_at = _leaderboard_sequence
+    
+    board = Leaderboard(load_leaderboard_entries())
+    
+    # Changes are applied and logged under the same lock, so none can land on
+    # the old board between this replay and the swap
+    with _leaderboard_lock:
+        changed = {user_id for sequence, user_id in _leaderboard_changes if sequence > started_at}
+        if _leaderboard_changes and _leaderboard_changes[0][0] > started_at + 1:
+            # The log overflowed during the load; reload again on the next request
+            board.loaded_at = float('-inf')
+        if changed:
+            fresh = {entry.user_id: entry for entry in load_leaderboard_entries(list(changed))}
+            for user_id in changed:
+                if user_id in fresh:
+                    board.put(fresh[user_id])
+                else:
+                    board.remove(user_id)
+        _leaderboard = board
+    return board
+
+
+def reconcile_leaderboard_async():
+    """Reload in a background thread; requests keep using the current board meanwhile."""
+    global _leaderboard_reloading
+    
+    with _leaderboard_lock:
+        if _leaderboard_reloading:
+            return
+        _leaderboard_reloading = True
+    
+    def run():
+        global _leaderboard_reloading
+        try:
+            with app.app_context():
+                reload_leaderboard()
+                db.session.remove()
+        except Exception as e:
+            print(f"Leaderboard reload error: {e}")
+        finally:
+            _leaderboard_reloading = False
+    
+    threading.Thread(target=run, name='leaderboard-reload', daemon=True).start()
+
+
+def get_leaderboard():
+    """Return this process's leaderboard, loading it on first use and reconciling it when stale."""
+    global _leaderboard_loading
+    
+    board = _leaderboard
+    if board is None:
+        # First load: one thread reads the users, concurrent requests wait for its board
+        with _leaderboard_lock:
+            while _leaderboard is None and _leaderboard_loading:
+                _leaderboard_loaded.wait()
+            if _leaderboard is not None:
+                return _leaderboard
+            _leaderboard_loading = True
+        try:
+            return reload_leaderboard()
+        finally:
+            with _leaderboard_lock:
+                _leaderboard_loading = False
+                _leaderboard_loaded.notify_all()
+    
+    if time.monotonic() - board.loaded_at > app.config.get('LEADERBOARD_RECONCILE_SECONDS', LEADERBOARD_RECONCILE_SECONDS):
+        reconcile_leaderboard_async()
+    return board
+
+
+LEADERBOARD_PAGE_SIZE = 50
+LEADERBOARD_MAX_PAGE_SIZE = 200
+
+
+def encode_leaderboard_cursor(entry):
+    """Opaque cursor for the position just after entry: its (total_points, name, user_id)."""
+    raw = json.dumps([entry.points, entry.name, entry.user_id], ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_leaderboard_cursor(cursor):
+    """Sort key encoded in a cursor, or None if the cursor is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        points, name, user_id = json.loads(raw.decode('utf-8'))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(points, int) or not isinstance(name, str) or not isinstance(user_id, int):
+        return None
+    return (-points, name, user_id)
+
+
+def leaderboard_entry_dict(rank, entry, current_user_id):
+    return {
+        'rank': rank,
+        'user_id': entry.user_id,
+        'username': entry.name,
+        'profile_picture': entry.profile_picture,
+        'score': entry.points,
+        'words': entry.words,
+        'is_current_user': entry.user_id == current_user_id
+    }
+
+
+def leaderboard_page(board, cursor, limit, current_user_id):
+    """One page of the leaderboard after cursor (from the top when None) plus the next cursor."""
+    if cursor:
+        sort_key = decode_leaderboard_cursor(cursor)
+        if sort_key is None:
+            return None
+        rows = board.after(sort_key, limit + 1)
+    else:
+        rows = board.top(limit + 1)
+    
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        'entries': [leaderboard_entry_dict(rank, entry, current_user_id) for rank, entry in rows],
+        'next_cursor': encode_leaderboard_cursor(rows[-1][1]) if has_more else None
+    }
+
+
+def update_leaderboard(user, words_learned=0):
+    """Apply a committed change to user's points, name or avatar (and words_learned more words)."""
+    with _leaderboard_lock:
+        board = _leaderboard
+        if board is not None:
+            if user.is_admin:
+                board.remove(user.user_id)
+            else:
+                entry = board.get(user.user_id)
+                words = (entry.words if entry else 0) + words_learned
+                board.put(LeaderboardEntry(user.user_id, user.name, user.profile_picture, user.total_points, words))
+        # Logged even before the first load finishes, which replays it
+        log_leaderboard_change(user.user_id)
+
+
+def remove_from_leaderboard(user_id):
+    """Drop a deleted user from the leaderboard."""
+    with _leaderboard_lock:
+        if _leaderboard is not None:
+            _leaderboard.remove(user_id)
+        log_leaderboard_change(user_id)
+
+
+@app.route('/api/leaderboard')
+@login_required
+def api_leaderboard():
+    """One page of the leaderboard; pass next_cursor back as cursor for the following page"""
+    limit = min(max(request.args.get('limit', LEADERBOARD_PAGE_SIZE, type=int), 1), LEADERBOARD_MAX_PAGE_SIZE)
+    page = leaderboard_page(get_leaderboard(), request.args.get('cursor'), limit, session.get('user_id'))
+    if page is None:
+        return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+    return jsonify({'success': True, **page})
+
+
+@app.route('/api/leaderboard/podium')
+@login_required
+def api_leaderboard_podium():
+    """Top three users, compact"""
+    return jsonify({'success': True, 'podium': [{
+        'rank': rank,
+        'user_id': entry.user_id,
+        'username': entry.name,
+        'profile_picture': entry.profile_picture,
+        'score': entry.points
+    } for rank, entry in get_leaderboard().top(3)]})
+
+
+def leaderboard_around(user_id, radius):
+    """Rank, ranked user count and neighbourhood of a user, all read from one board."""
+    board = get_leaderboard()
+    return {
+        'rank': board.rank(user_id),
+        'total_users': len(board),
+        'entries': [leaderboard_entry_dict(rank, entry, user_id) for rank, entry in board.around(user_id, radius)]
+    }
+
+
+@app.route('/api/leaderboard/around_me')
+@login_required
+def api_leaderboard_around_me():
+    """The current user's rank with a few neighbours on each side"""
+    radius = min(max(request.args.get('radius', 3, type=int), 0), 25)
+    return jsonify({'success': True, **leaderboard_around(session.get('user_id'), radius)})
+
+
+@app.route('/api/rank')
+@login_required
+def api_rank():
+    """Current user's rank and the users just above and below (around_me with a smaller default radius)"""
+    radius = min(max(request.args.get('radius', 2, type=int), 0), 25)
+    around = leaderboard_around(session.get('user_id'), radius)
+    return jsonify({'success': True, 'rank': around['rank'], 'total_users': around['total_users'],
+                    'around': around['entries']})
+
+
+# ---------- PERIOD LEADERBOARDS ----------
+# Weekly and monthly boards read a per-user, per-period rollup that
+# bump_user_stats keeps current, so no request touches user_words. Once a
+# period is over the scheduler copies its final standings into
+# leaderboard_snapshot and records it in snapshotted_period; past boards are
+# read from there, or live until the snapshot exists.
+LEADERBOARD_PERIODS = ('week', 'month')
+
+
+def period_start(period_type, day):
+    """First day of the week (Monday) or month containing day."""
+    if period_type == 'week':
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def next_period_start(period_type, start):
+    if period_type == 'week':
+        return start + timedelta(days=7)
+    return (start + timedelta(days=32)).replace(day=1)
+
+
+def previous_period_start(period_type, start):
+    return period_start(period_type, start - timedelta(days=1))
+
+
+def bump_period_stats(user_id, exp_earned=0, words_learned=0, moment=None):
+    """Add EXP and words to the user's current week and month. The caller commits."""
+    day = (moment or datetime.now(ph_timezone)).date()
+    rows = [{
+        'user_id': user_id,
+        'period_type': period_type,
+        'period_start': period_start(period_type, day),
+        'exp_earned': exp_earned,
+        'words_learned': words_learned
+    } for period_type in LEADERBOARD_PERIODS]
+    
+    stmt = sqlite_insert(UserPeriodStats).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id', 'period_type', 'period_start'],
+        set_={
+            'exp_earned': UserPeriodStats.exp_earned + stmt.excluded.exp_earned,
+            'words_learned': UserPeriodStats.words_learned + stmt.excluded.words_learned
+        }
+    )
+    db.session.execute(stmt)
+
+
+def period_board_query(period_type, start):
+    """Live standings of a period: (user_id, name, exp_earned, words_learned), best first."""
+    return db.session.query(
+        UserPeriodStats.user_id, UserAcc.name, UserPeriodStats.exp_earned, UserPeriodStats.words_learned
+    ).join(UserAcc, UserAcc.user_id == UserPeriodStats.user_id).filter(
+        UserPeriodStats.period_type == period_type,
+        UserPeriodStats.period_start == start,
+        UserPeriodStats.exp_earned > 0,
+        UserAcc.is_admin == False
+    ).order_by(UserPeriodStats.exp_earned.desc(), UserAcc.name, UserPeriodStats.user_id)
+
+
+def is_period_snapshotted(period_type, start):
+    return db.session.query(SnapshottedPeriod.period_start).filter_by(
+        period_type=period_type, period_start=start
+    ).first() is not None
+
+
+def snapshot_period(period_type, start):
+    """Copy a closed period's final standings into leaderboard_snapshot (once). Returns rows written."""
+    if is_period_snapshotted(period_type, start):
+        return 0
+    
+    ranked = period_board_query(period_type, start).add_columns(
+        func.row_number().over(
+            order_by=(UserPeriodStats.exp_earned.desc(), UserAcc.name, UserPeriodStats.user_id)
+        ).label('rank')
+    ).subquery()
+    try:
+        # The marker also covers periods with no ranked users, so they are not retried
+        db.session.execute(SnapshottedPeriod.__table__.insert().values(
+            period_type=period_type, period_start=start, snapshotted_at=datetime.utcnow()
+        ))
+        result = db.session.execute(
+            LeaderboardSnapshot.__table__.insert().from_select(
+                ['period_type', 'period_start', 'rank', 'user_id', 'name', 'exp_earned', 'words_learned'],
+                select(
+                    literal(period_type), literal(start, db.Date), ranked.c.rank, ranked.c.user_id,
+                    ranked.c.name, ranked.c.exp_earned, ranked.c.words_learned
+                )
+            )
+        )
+        db.session.commit()
+    except IntegrityError:
+        # Another process wrote the same snapshot first
+        db.session.rollback()
+        return 0
+    return result.rowcount
+
+
+def snapshot_closed_periods(today=None):
+    """Snapshot every finished week and month that has rollup rows but no snapshot yet."""
+    today = today or datetime.now(ph_timezone).date()
+    written = 0
+    
+    for period_type in LEADERBOARD_PERIODS:
+        snapshotted = select(SnapshottedPeriod.period_start).where(
+            SnapshottedPeriod.period_type == period_type
+        )
+        closed = db.session.query(UserPeriodStats.period_start).filter(
+            UserPeriodStats.period_type == period_type,
+            UserPeriodStats.period_start < period_start(period_type, today),
+            UserPeriodStats.period_start.notin_(snapshotted)
+        ).distinct().all()
+        for (start,) in closed:
+            written += snapshot_period(period_type, start)
+    
+    return written
+
+
+def get_period_board(period_type, start, limit, user_id):
+    """Standings of one period: top entries and the user's own row, from the snapshot once it exists.
+
+    A closed period the scheduler has not snapshotted yet is served live; this
+    read path never writes.
+    """
+    today = datetime.now(ph_timezone).date()
+    closed = start < period_start(period_type, today)
+    
+    if closed and is_period_snapshotted(period_type, start):
+        rows = db.session.query(
+            LeaderboardSnapshot.rank, LeaderboardSnapshot.user_id, LeaderboardSnapshot.name,
+            LeaderboardSnapshot.exp_earned, LeaderboardSnapshot.words_learned
+        ).filter_by(period_type=period_type, period_start=start)
+        entries = rows.order_by(LeaderboardSnapshot.rank).limit(limit).all()
+        me = rows.filter(LeaderboardSnapshot.user_id == user_id).first()
+    else:
+        board = period_board_query(period_type, start)
+        entries = [(rank, *row) for rank, row in enumerate(board.limit(limit).all(), start=1)]
+        
+        me = None
+        mine = db.session.query(UserPeriodStats.exp_earned, UserPeriodStats.words_learned, UserAcc.name)\
+            .join(UserAcc, UserAcc.user_id == UserPeriodStats.user_id)\
+            .filter(UserPeriodStats.user_id == user_id,
+                    UserPeriodStats.period_type == period_type,
+                    UserPeriodStats.period_start == start,
+                    UserPeriodStats.exp_earned > 0,
+                    UserAcc.is_admin == False).first()
+        if mine:
+            ahead = board.order_by(None).filter(or_(
+                UserPeriodStats.exp_earned > mine.exp_earned,
+                and_(UserPeriodStats.exp_earned == mine.exp_earned, or_(
+                    UserAcc.name < mine.name,
+                    and_(UserAcc.name == mine.name, UserPeriodStats.user_id < user_id)
+                ))
+            )).count()
+            me = (ahead + 1, user_id, mine.name, mine.exp_earned, mine.words_learned)
+    
+    def entry_dict(row):
+        rank, entry_user_id, name, exp_earned, words_learned = row
+        return {
+            'rank': rank,
+            'user_id': entry_user_id,
+            'username': name,
+            'score': exp_earned,
+            'words': words_learned,
+            'is_current_user': entry_user_id == user_id
+        }
+    
+    return {
+        'period': period_type,
+        'start': start.isoformat(),
+        'end': (next_period_start(period_type, start) - timedelta(days=1)).isoformat(),
+        'closed': closed,
+        'entries': [entry_dict(row) for row in entries],
+        'me': entry_dict(me) if me else None
+    }
+
+
+@app.route('/api/leaderboard/period/<period_type>')
+@login_required
+def api_period_leaderboard(period_type):
+    """Weekly or monthly leaderboard: the current period, ?ago=N periods back, or the one containing ?start=YYYY-MM-DD"""
+    if period_type not in LEADERBOARD_PERIODS:
+        return jsonify({'success': False, 'error': 'Period must be week or month'}), 404
+    
+    limit = min(max(request.args.get('limit', LEADERBOARD_PAGE_SIZE, type=int), 1), LEADERBOARD_MAX_PAGE_SIZE)
+    try:
+        if request.args.get('start'):
+            start = period_start(period_type, date.fromisoformat(request.args['start']))
+        else:
+            start = period_start(period_type, datetime.now(ph_timezone).date())
+            for _ in range(min(max(request.args.get('ago', 0, type=int), 0), 120)):
+                start = previous_period_start(period_type, start)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'start must be YYYY-MM-DD'}), 400
+    
+    return jsonify({'success': True, **get_period_board(period_type, start, limit, session.get('user_id'))})
+
+
+# ---------- USER STAT COUNTERS ----------
+USER_STAT_COUNTERS = ('words_learned', 'exp_earned', 'sessions_completed', 'logouts')
+
+
+def bump_user_stats(user_id, **deltas):
+    """Add deltas to a user's counters (and this week's/month's rollup). The caller commits with its own changes."""
+    values = {name: deltas.get(name, 0) for name in USER_STAT_COUNTERS}
+    stmt = sqlite_insert(UserStats).values(user_id=user_id, **values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id'],
+        set_={name: getattr(UserStats, name) + getattr(stmt.excluded, name) for name in deltas}
+    )
+    db.session.execute(stmt)
+    
+    if values['exp_earned'] or values['words_learned']:
+        bump_period_stats(user_id, values['exp_earned'], values['words_learned'])
+
+
+def iter_user_id_ranges(chunk_size=1000, non_admin_only=False):
+    """Yield (first_id, last_id) ranges of about chunk_size users without loading the table."""
+    last_user_id = 0
+    
+    while True:
+        query = db.session.query(UserAcc.user_id).filter(UserAcc.user_id > last_user_id)
+        if non_admin_only:
+            query = query.filter(UserAcc.is_admin == False)
+        
+        first_id = query.order_by(UserAcc.user_id).limit(1).scalar()
+        if first_id is None:
+            return
+        
+        last_id = query.order_by(UserAcc.user_id).offset(chunk_size - 1).limit(1).scalar()
+        if last_id is None:
+            last_id = query.order_by(UserAcc.user_id.desc()).limit(1).scalar()
+        
+        yield first_id, last_id
+        last_user_id = last_id
+
+
+def rebuild_user_stats(chunk_size=1000):
+    """Rebuild every user's counters from the raw tables, one chunk of users at a time.
+
+    Words come from UserWords and EXP from total_points. Sessions have no raw
+    table, so the existing counter is kept; logouts are at least 1 when
+    last_logout is set.
+    """
+    rebuilt = 0
+    
+    for first_id, last_id in iter_user_id_ranges(chunk_size):
+        result = db.session.execute(text("""
+            INSERT INTO user_stats (user_id, words_learned, exp_earned, sessions_completed, logouts)
+            SELECT u.user_id,
+                   (SELECT COUNT(*) FROM user_words w WHERE w.user_id = u.user_id),
+                   COALESCE(u.total_points, 0),
+                   COALESCE(s.sessions_completed, 0),
+                   MAX(COALESCE(s.logouts, 0), CASE WHEN u.last_logout IS NOT NULL THEN 1 ELSE 0 END)
+            FROM user_acc u
+            LEFT JOIN user_stats s ON s.user_id = u.user_id
+            WHERE u.user_id BETWEEN :first_id AND :last_id
+            ON CONFLICT (user_id) DO UPDATE SET
+                words_learned = excluded.words_learned,
+                exp_earned = excluded.exp_earned,
+                sessions_completed = excluded.sessions_completed,
+                logouts = excluded.logouts
+        """), {'first_id': first_id, 'last_id': last_id})
+        db.session.commit()
+        rebuilt += result.rowcount
+    
+    return rebuilt
+
+
+# ---------- ACTIVITY BITMAP ----------
+# Each user's learning days are one bitset: bit i (little-endian) is day
+# base_day + i, where day numbers are date ordinals in the user's own timezone
+# (UserAcc.timezone, Philippine time by default). Streaks, active-day counts
+# and calendars are bit operations on that single row.
+def resolve_timezone(name):
+    """pytz timezone for a name, falling back to Philippine time."""
+    try:
+        return pytz.timezone(name or 'Asia/Manila')
+    except pytz.UnknownTimeZoneError:
+        return ph_timezone
+
+
+def get_user_timezone(user):
+    """The user's timezone, falling back to Philippine time."""
+    return resolve_timezone(user.timezone)
+
+
+def activity_day(moment=None, tz=ph_timezone):
+    """Day number of a moment in tz (naive datetimes are already local)."""
+    if moment is None:
+        moment = datetime.now(tz)
+    if isinstance(moment, datetime):
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(tz)
+        moment = moment.date()
+    return moment.toordinal()
+
+
+def activity_bits(activity):
+    return int.from_bytes(activity.bits or b'', 'little')
+
+
+def set_activity_day(activity, day):
+    """Mark a day as active, growing the bitset as needed."""
+    value = activity_bits(activity)
+    if day < activity.base_day:
+        value <<= activity.base_day - day
+        activity.base_day = day
+    value |= 1 << (day - activity.base_day)
+    
+    activity.bits = value.to_bytes((value.bit_length() + 7) // 8, 'little')
+    activity.last_active_day = max(activity.last_active_day or day, day)
+
+
+def activity_streak_ending(activity, day):
+    """Number of consecutive active days ending on day."""
+    position = day - activity.base_day
+    if position < 0:
+        return 0
+    
+    mask = (1 << (position + 1)) - 1
+    gaps = ~activity_bits(activity) & mask
+    return position + 1 - gaps.bit_length()
+
+
+def current_activity_streak(activity, today):
+    """A streak is still alive until the end of the day after the last active day."""
+    return activity_streak_ending(activity, today) or activity_streak_ending(activity, today - 1)
+
+
+def longest_activity_streak(activity):
+    value = activity_bits(activity)
+    longest = 0
+    while value:
+        value &= value >> 1
+        longest += 1
+    return longest
+
+
+def count_active_days(activity, first_day, last_day):
+    """Active days between first_day and last_day inclusive."""
+    first = max(first_day - activity.base_day, 0)
+    last = last_day - activity.base_day
+    if last < first:
+        return 0
+    window = (activity_bits(activity) >> first) & ((1 << (last - first + 1)) - 1)
+    return bin(window).count('1')
+
+
+def record_learning_activity(user, moment=None):
+    """Mark today as a learning day and refresh the streak. The caller commits."""
+    if user.is_admin:
+        return
+    
+    tz = get_user_timezone(user)
+    day = activity_day(moment, tz)
+    activity = UserActivity.query.get(user.user_id)
+    if activity is None:
+        activity = UserActivity(user_id=user.user_id, base_day=day, bits=b'')
+        db.session.add(activity)
+    set_activity_day(activity, day)
+    
+    user.current_streak = current_activity_streak(activity, activity_day(tz=tz))
+    user.longest_streak = max(user.longest_streak or 0, user.current_streak)
+
+
+def rebuild_user_activity(chunk_size=1000):
+    """Merge every learned word's date into the activity bitmaps, one chunk of users at a time."""
+    rebuilt = 0
+    
+    for first_id, last_id in iter_user_id_ranges(chunk_size, non_admin_only=True):
+        learned_days = db.session.query(
+            UserWords.user_id, func.date(UserWords.date_learned)
+        ).filter(
+            UserWords.user_id.between(first_id, last_id),
+            UserWords.date_learned.isnot(None)
+        ).distinct().all()
+        
+        activities = {
+            activity.user_id: activity
+            for activity in UserActivity.query.filter(UserActivity.user_id.between(first_id, last_id))
+        }
+        
+        for user_id, day in learned_days:
+            day = date.fromisoformat(day).toordinal()
+            activity = activities.get(user_id)
+            if activity is None:
+                activity = activities[user_id] = UserActivity(user_id=user_id, base_day=day, bits=b'')
+                db.session.add(activity)
+            set_activity_day(activity, day)
+        
+        db.session.commit()
+        rebuilt += len(activities)
     
-    # Create notification
-    notification = Notification(
-        user_id=user.user_id,
-        title='New Partner!',
-        message=f'{pokemon.name} is now your learning partner! ⚡',
-        notification_type='pokemon'
+    return rebuilt
+
+
+def sweep_broken_streaks(chunk_size=5000):
+    """Reset streaks whose last learning day is before yesterday in the user's own timezone.
+
+    Users are grouped by timezone so "yesterday" is computed once per group, and
+    each chunk of users is a single UPDATE. Returns (users scanned, streaks reset, seconds).
+    """
+    started = time.perf_counter()
+    
+    # Latest day that still keeps a streak alive, per timezone
+    cutoffs = {}
+    for (name,) in db.session.query(func.coalesce(UserAcc.timezone, 'Asia/Manila')).distinct():
+        cutoffs[name] = activity_day(tz=resolve_timezone(name)) - 1
+    
+    if not cutoffs:
+        return 0, 0, time.perf_counter() - started
+    
+    cutoff = case(
+        *[(func.coalesce(UserAcc.timezone, 'Asia/Manila') == name, day) for name, day in cutoffs.items()],
+        else_=activity_day() - 1
     )
-    db.session.add(notification)
+    last_active_day = select(UserActivity.last_active_day)\
+        .where(UserActivity.user_id == UserAcc.user_id)\
+        .scalar_subquery()
+    
+    scanned = reset = 0
+    for first_id, last_id in iter_user_id_ranges(chunk_size, non_admin_only=True):
+        result = db.session.execute(
+            UserAcc.__table__.update()
+            .where(
+                UserAcc.user_id.between(first_id, last_id),
+                UserAcc.is_admin == False,
+                UserAcc.current_streak > 0,
+                func.coalesce(last_active_day, 0) < cutoff
+            )
+            .values(current_streak=0)
+        )
+        db.session.commit()
+        
+        reset += result.rowcount
+        scanned += UserAcc.query.filter(
+            UserAcc.user_id.between(first_id, last_id), UserAcc.is_admin == False
+        ).count()
     
-    db.session.commit()
-   
-    flash(f"{pokemon.name} is now your starter Pokémon! ⚡", "success")
-    return redirect(url_for('dashboard'))
+    return scanned, reset, time.perf_counter() - started
+
+
+@app.route('/api/activity_calendar')
+@login_required
+def activity_calendar():
+    """Learning days for the calendar heatmap plus streak summary"""
+    user = get_current_user()
+    days = min(max(request.args.get('days', 365, type=int), 1), 3660)
+    
+    today = activity_day(tz=get_user_timezone(user))
+    first_day = today - days + 1
+    activity = UserActivity.query.get(user.user_id)
+    
+    active_dates = []
+    active_this_month = 0
+    longest_streak = user.longest_streak or 0
+    if activity:
+        value = activity_bits(activity) >> max(first_day - activity.base_day, 0)
+        day = max(first_day, activity.base_day)
+        while value:
+            if value & 1:
+                active_dates.append(date.fromordinal(day).isoformat())
+            value >>= 1
+            day += 1
+        
+        month_start = date.fromordinal(today).replace(day=1).toordinal()
+        active_this_month = count_active_days(activity, month_start, today)
+        longest_streak = max(longest_streak, longest_activity_streak(activity))
+    
+    return jsonify({
+        'success': True,
+        'start_date': date.fromordinal(first_day).isoformat(),
+        'end_date': date.fromordinal(today).isoformat(),
+        'active_dates': active_dates,
+        'active_days_this_month': active_this_month,
+        'current_streak': current_activity_streak(activity, today) if activity else 0,
+        'longest_streak': longest_streak
+    })
+
+
+# ---------- ACHIEVEMENT METRICS ----------
+# Every achievement declares the metric that drives its progress. All metrics
+# for a user are read together in a single query, so adding achievements does
+# not add queries.
+ACHIEVEMENT_METRICS = {
+    'account_created': literal(1),
+    'words_learned': func.coalesce(UserStats.words_learned, 0),
+    'exp_earned': func.coalesce(UserStats.exp_earned, 0),
+    'sessions_completed': func.coalesce(UserStats.sessions_completed, 0),
+    'logouts': func.coalesce(UserStats.logouts, 0),
+    'total_points': func.coalesce(UserAcc.total_points, 0),
+    'logged_out': case((UserAcc.last_logout.isnot(None), 1), else_=0),
+    'streak': func.coalesce(UserAcc.current_streak, 0),
+    'longest_streak': func.coalesce(UserAcc.longest_streak, 0),
+    'pokemon_collected': (
+        select(func.count(UserPokemon.user_pokemon_id))
+        .where(UserPokemon.user_id == UserAcc.user_id)
+        .scalar_subquery()
+    ),
+}
+
+# Metric for achievements created before metrics existed, by their exact seeded name
+LEGACY_ACHIEVEMENT_METRICS = {
+    'Journey Begins': 'account_created',
+    'Zzz': 'logged_out',
+    'Solo Leveling': 'total_points',
+    'Vocabulary Novice': 'words_learned',
+    'Word Collector': 'words_learned',
+    'Language Master': 'words_learned',
+    'Flashcard Champion': 'sessions_completed',
+    'Word Novice': 'words_learned',
+    'Word Apprentice': 'words_learned',
+    'Word Scholar': 'words_learned',
+    'Word Master': 'words_learned',
+    'Vocabulary King': 'words_learned',
+    'Streak Starter': 'streak',
+    'Weekly Warrior': 'streak',
+    'Monthly Master': 'streak',
+    'Dedicated Learner': 'streak',
+    'Daily Learner': 'streak',
+    'Point Collector': 'total_points',
+    'Point Accumulator': 'total_points',
+    'Point Master': 'total_points',
+}
+
+
+def infer_achievement_metric(name):
+    """Metric of a legacy achievement, or None when its name is not a known legacy one."""
+    metric = LEGACY_ACHIEVEMENT_METRICS.get(name)
+    if metric is None:
+        print(f"⚠️ No metric known for legacy achievement {name!r}; set one in the admin panel")
+    return metric
+
+
+def get_user_metrics(user_id):
+    """Compute every achievement metric for a user in one aggregate query."""
+    row = db.session.query(
+        *[expression.label(name) for name, expression in ACHIEVEMENT_METRICS.items()]
+    ).select_from(UserAcc).outerjoin(
+        UserStats, UserStats.user_id == UserAcc.user_id
+    ).filter(UserAcc.user_id == user_id).first()
+    
+    if not row:
+        return {name: 0 for name in ACHIEVEMENT_METRICS}
+    return {name: int(value or 0) for name, value in row._mapping.items()}
 
 
 def check_and_update_achievements(user):
-    """Check all achievements and update progress ONLY - do not auto-claim."""
-    all_achievements = Achievement.query.all()
+    """Update progress for every achievement in one pass - do not auto-claim.
+
+    Returns the achievements that became claimable during this update.
+    """
+    all_achievements = get_catalog().achievements
+    if not all_achievements:
+        return []
+    
+    metrics = get_user_metrics(user.user_id)
+    
+    # Existing progress rows for this user, keyed by achievement
+    existing = {
+        achievement_id: (progress, date_earned)
+        for achievement_id, progress, date_earned in db.session.query(
+            UserAchievement.achievement_id,
+            UserAchievement.current_progress,
+            UserAchievement.date_earned
+        ).filter(UserAchievement.user_id == user.user_id)
+    }
     
+    rows = []
+    newly_claimable = []
     for achievement in all_achievements:
-        # Get or create UserAchievement record
-        user_achievement = UserAchievement.query.filter_by(
-            user_id=user.user_id,
-            achievement_id=achievement.achievement_id
-        ).first()
-        
-        if not user_achievement:
-            # Create new UserAchievement record
-            user_achievement = UserAchievement(
-                user_id=user.user_id,
-                achievement_id=achievement.achievement_id,
-                current_progress=0,
-                date_earned=None
-            )
-            db.session.add(user_achievement)
+        current_progress = metrics.get(achievement.metric, 0)
+        old_progress, date_earned = existing.get(achievement.achievement_id, (None, None))
         
-        # Calculate current progress based on achievement
-        current_progress = 0
+        if old_progress == current_progress:
+            continue
         
-        # WORD COLLECTOR ACHIEVEMENT - Learn 10 different words
-        if "Word Collector" in achievement.name:
-            current_progress = UserWords.query.filter_by(user_id=user.user_id).count()
-            
-        # ZZZ ACHIEVEMENT - Logout for the first time
-        elif "Zzz" in achievement.name:
-            current_progress = 1 if user.last_logout else 0
-            
-        # SOLO LEVELING ACHIEVEMENT - Reach 500 points
-        elif "Solo Leveling" in achievement.name:
-            current_progress = user.total_points or 0
-            
-        # JOURNEY BEGINS ACHIEVEMENT - Welcome to VocabuLearner!
-        elif "Journey Begins" in achievement.name:
-            current_progress = 1  # Always earned when account is created
+        rows.append({
+            'user_id': user.user_id,
+            'achievement_id': achievement.achievement_id,
+            'current_progress': current_progress
+        })
         
-        # Other achievement types
-        elif "Vocabulary Novice" in achievement.name:
-            current_progress = UserWords.query.filter_by(user_id=user.user_id).count()
-        elif "Flashcard Champion" in achievement.name:
-            # You'll need to track flashcard sessions separately
-            current_progress = 0  # TODO: Add flashcard session tracking
-
-        user_achievement.current_progress = current_progress
-
+        requirement = achievement.requirement or 0
+        if not date_earned and (old_progress or 0) < requirement <= current_progress:
+            newly_claimable.append(achievement)
+    
+    if rows:
+        # Upsert all changed progress rows in a single statement
+        stmt = sqlite_insert(UserAchievement).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id', 'achievement_id'],
+            set_={'current_progress': stmt.excluded.current_progress}
+        )
+        db.session.execute(stmt)
+    
     db.session.commit()
+    return newly_claimable
 
 def check_and_update_pokemon_evolution(user):
     """Check if user qualifies for Pokémon evolution and update if needed."""
     if not user.pokemon_id:
         return False, None, None
     
-    current_pokemon = Pokemon.query.get(user.pokemon_id)
+    catalog = get_catalog()
+    current_pokemon = catalog.get_pokemon(user.pokemon_id)
     if not current_pokemon:
         return False, None, None
     
-    # Get all Pokémon in the same family
-    evolution_line = (
-        Pokemon.query
-        .filter_by(family_id=current_pokemon.family_id)
-        .order_by(Pokemon.min_points_required)
-        .all()
-    )
+    # Get all Pokémon in the same family (ordered by min_points_required)
+    evolution_line = catalog.pokemon_by_family.get(current_pokemon.family_id, ())
     
     # Find the highest evolution the user qualifies for
     highest_evolution = None
@@ -1762,6 +3914,158 @@ def check_and_update_pokemon_evolution(user):
     
     return False, None, None
 
+# ---------- BACKGROUND EVALUATION QUEUE ----------
+# Routes record "re-evaluate user X" in the evaluation_job table and return;
+# worker threads run the achievement and evolution checks and report the
+# outcome as notifications. The table survives restarts, and a job claimed by
+# a worker that died is picked up again after EVALUATION_CLAIM_TIMEOUT.
+EVALUATION_WORKERS = 2
+EVALUATION_POLL_SECONDS = 2
+EVALUATION_CLAIM_TIMEOUT = timedelta(minutes=5)
+EVALUATION_MAX_ATTEMPTS = 5
+
+evaluation_wakeup = threading.Event()
+_evaluation_workers = []
+_evaluation_workers_lock = threading.Lock()
+
+
+def enqueue_user_evaluation(user_id):
+    """Queue a re-evaluation for a user. Duplicate requests for the same user coalesce."""
+    stmt = sqlite_insert(EvaluationJob).values(user_id=user_id, requested_at=datetime.utcnow(), attempts=0)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id'],
+        set_={'requested_at': stmt.excluded.requested_at}
+    )
+    db.session.execute(stmt)
+    db.session.commit()
+    
+    start_evaluation_workers()
+    evaluation_wakeup.set()
+
+
+def evaluate_user(user):
+    """Run the achievement and evolution checks for a user and notify them of the outcome."""
+    for achievement in check_and_update_achievements(user):
+        db.session.add(Notification(
+            user_id=user.user_id,
+            title="🏆 Achievement Unlocked!",
+            message=f"{achievement.name} is ready to claim! Visit your profile for +{achievement.points_reward} EXP",
+            notification_type='achievement',
+            is_read=False,
+            created_at=datetime.utcnow()
+        ))
+    
+    evolved, old_pokemon, new_pokemon = check_and_update_pokemon_evolution(user)
+    if evolved:
+        db.session.add(Notification(
+            user_id=user.user_id,
+            title="✨ Pokémon Evolved!",
+            message=f"{old_pokemon} evolved into {new_pokemon}! 🎉",
+            notification_type='pokemon',
+            is_read=False,
+            created_at=datetime.utcnow()
+        ))
+    
+    db.session.commit()
+
+
+def claim_evaluation_job():
+    """Claim the oldest pending job, or one abandoned by a dead worker. Returns the job or None."""
+    now = datetime.utcnow()
+    stale_before = now - EVALUATION_CLAIM_TIMEOUT
+    available = or_(EvaluationJob.claimed_at.is_(None), EvaluationJob.claimed_at < stale_before)
+    
+    job = EvaluationJob.query.filter(available).order_by(EvaluationJob.requested_at).first()
+    if not job:
+        return None
+    
+    # Compare-and-set so two workers (or processes) never run the same job
+    claimed = EvaluationJob.query.filter(
+        EvaluationJob.job_id == job.job_id, available
+    ).update({
+        'claimed_at': now,
+        'attempts': EvaluationJob.attempts + 1
+    }, synchronize_session=False)
+    db.session.commit()
+    
+    if not claimed:
+        return None
+    
+    db.session.refresh(job)
+    return job
+
+
+def process_next_evaluation_job():
+    """Claim and run one job. Returns False when the queue is empty."""
+    job = claim_evaluation_job()
+    if not job:
+        return False
+    
+    job_id, user_id, requested_at = job.job_id, job.user_id, job.requested_at
+    
+    try:
+        user = UserAcc.query.get(user_id)
+        if user:
+            evaluate_user(user)
+    except Exception as e:
+        db.session.rollback()
+        print(f"ERROR evaluating user {user_id}: {str(e)}")
+        traceback.print_exc()
+        
+        if job.attempts >= EVALUATION_MAX_ATTEMPTS:
+            EvaluationJob.query.filter_by(job_id=job_id).delete()
+            db.session.commit()
+            print(f"⚠️ Dropped evaluation job for user {user_id} after {job.attempts} attempts")
+        return True
+    
+    # Finish the job unless the user was re-queued while we were working
+    finished = EvaluationJob.query.filter_by(job_id=job_id, requested_at=requested_at).delete()
+    if not finished:
+        EvaluationJob.query.filter_by(job_id=job_id).update({'claimed_at': None, 'attempts': 0})
+    db.session.commit()
+    return True
+
+
+def evaluation_worker_loop():
+    """Drain the queue, then sleep until woken or until the next poll."""
+    while True:
+        evaluation_wakeup.wait(EVALUATION_POLL_SECONDS)
+        evaluation_wakeup.clear()
+        
+        try:
+            busy = True
+            while busy:
+                # One app context per job: a fresh g re-checks the catalog
+                # version (admin edits land between jobs) and a fresh session
+                # drops the previous job's objects
+                with app.app_context():
+                    busy = process_next_evaluation_job()
+        except Exception as e:
+            print(f"ERROR in evaluation worker: {str(e)}")
+            traceback.print_exc()
+
+
+def start_evaluation_workers():
+    """Start the in-process worker threads once per process."""
+    if _evaluation_workers or not app.config.get('EVALUATION_WORKERS', EVALUATION_WORKERS):
+        return
+    
+    with _evaluation_workers_lock:
+        if _evaluation_workers:
+            return
+        for i in range(app.config.get('EVALUATION_WORKERS', EVALUATION_WORKERS)):
+            worker = threading.Thread(target=evaluation_worker_loop, name=f'evaluation-worker-{i}', daemon=True)
+            worker.start()
+            _evaluation_workers.append(worker)
+
+
+@app.cli.command('run-evaluation-worker')
+def run_evaluation_worker_command():
+    """Run a dedicated evaluation worker in the foreground."""
+    print("Evaluation worker started. Press Ctrl+C to stop.")
+    evaluation_worker_loop()
+
+
 @app.route('/api/claim_achievement/<int:achievement_id>', methods=['POST'])
 @login_required
 def claim_achievement(achievement_id):
@@ -1779,7 +4083,8 @@ def claim_achievement(achievement_id):
             return jsonify({'success': False, 'error': 'Achievement not found for user'}), 404
         
         # Get the achievement details
-        achievement = Achievement.query.get(achievement_id)
+        catalog = get_catalog()
+        achievement = catalog.get_achievement(achievement_id)
         if not achievement:
             return jsonify({'success': False, 'error': 'Achievement not found'}), 404
         
@@ -1794,11 +4099,12 @@ def claim_achievement(achievement_id):
             
             # 2. Add points reward to user
             user.total_points = (user.total_points or 0) + achievement.points_reward
+            bump_user_stats(user.user_id, exp_earned=achievement.points_reward or 0)
             
             # 3. Check if achievement gives a Pokémon reward
             pokemon_reward_data = None
             if achievement.pokemon_id:
-                reward_pokemon = Pokemon.query.get(achievement.pokemon_id)
+                reward_pokemon = catalog.get_pokemon(achievement.pokemon_id)
                 if reward_pokemon:
                     # Check if user already has this Pokémon
                     existing = UserPokemon.query.filter_by(
@@ -1845,6 +4151,7 @@ def claim_achievement(achievement_id):
             db.session.add(notification)
             
             db.session.commit()
+            update_leaderboard(user)
             
             return jsonify({
                 'success': True,
@@ -1864,6 +4171,46 @@ def claim_achievement(achievement_id):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+def get_achievement_view(user_id):
+    """Achievements with the user's progress, claimability and reward sprite in one query."""
+    rows = db.session.query(
+        Achievement.achievement_id,
+        Achievement.name,
+        Achievement.description,
+        Achievement.points_reward,
+        Achievement.requirement,
+        UserAchievement.current_progress,
+        UserAchievement.date_earned,
+        Pokemon.name.label('pokemon_name'),
+        Pokemon.url.label('pokemon_url')
+    ).outerjoin(
+        UserAchievement,
+        and_(UserAchievement.achievement_id == Achievement.achievement_id,
+             UserAchievement.user_id == user_id)
+    ).outerjoin(
+        Pokemon, Pokemon.pokemon_id == Achievement.pokemon_id
+    ).order_by(Achievement.achievement_id).all()
+    
+    achievements = []
+    for row in rows:
+        is_earned = row.date_earned is not None
+        user_progress = row.current_progress or 0
+        achievements.append({
+            'achievement_id': row.achievement_id,
+            'name': row.name,
+            'description': row.description,
+            'points_reward': row.points_reward,
+            'requirement': row.requirement,
+            'date_earned': row.date_earned,
+            'is_earned': is_earned,
+            'can_claim': not is_earned and user_progress >= (row.requirement or 0),
+            'user_progress': user_progress,
+            'pokemon_name': row.pokemon_name,
+            'pokemon_url': row.pokemon_url
+        })
+    return achievements
+
+
 @app.route('/profile')
 def profile():
     if 'user_id' not in session:
@@ -1882,45 +4229,22 @@ def profile():
     pokemon = None
     pokemon_display_name = "No Pokémon Yet"
     
+    catalog = get_catalog()
     if user.pokemon_id:
-        pokemon = Pokemon.query.get(user.pokemon_id)
+        pokemon = catalog.get_pokemon(user.pokemon_id)
         pokemon_display_name = user.pokemon_name if user.pokemon_name else (pokemon.name if pokemon else "No Pokémon")
     
     # Get achievements data
-    achievements = Achievement.query.all()
-    achievements_data = []
-    
-    for achievement in achievements:
-        user_achievement = UserAchievement.query.filter_by(
-            user_id=user_id, 
-            achievement_id=achievement.achievement_id
-        ).first()
-        
-        is_earned = user_achievement and user_achievement.date_earned is not None
-        user_progress = user_achievement.current_progress if user_achievement else 0
-        
-        # CORRECTED: Calculate can_claim based on progress vs requirement
-        can_claim = not is_earned and user_progress >= achievement.requirement
-        
-        achievements_data.append({
-            'achievement_id': achievement.achievement_id,
-            'name': achievement.name,
-            'description': achievement.description,
-            'points_reward': achievement.points_reward,
-            'requirement': achievement.requirement,
-            'is_earned': is_earned,
-            'can_claim': can_claim,  # This was the bug!
-            'user_progress': user_progress
-        })
+    achievements_data = get_achievement_view(user_id)
     
     # Get Pokémon images for achievements
-    achievement_pokemon = {}
-    for achievement in achievements:
-        pokemon_for_achievement = Pokemon.query.get(achievement.pokemon_id)
-        achievement_pokemon[achievement.achievement_id] = {
-            'url': pokemon_for_achievement.url if pokemon_for_achievement else None,
-            'name': pokemon_for_achievement.name if pokemon_for_achievement else None
+    achievement_pokemon = {
+        achievement['achievement_id']: {
+            'url': achievement['pokemon_url'],
+            'name': achievement['pokemon_name']
         }
+        for achievement in achievements_data
+    }
     
     # Get Pokémon collection count
     collected_pokemon_count = UserPokemon.query.filter_by(user_id=user_id).count()
@@ -2051,6 +4375,7 @@ def insert_pokemon_data():
         db.session.add(pokemon)
 
 
+    invalidate_catalog()
     db.session.commit()
     return "Pokémon data inserted successfully!"
 
@@ -2181,51 +4506,33 @@ def progress():
 def leaderboard():
     current_user = get_current_user()
     
-    # Get all NON-ADMIN users ordered by total_points (descending)
-    users = UserAcc.query.filter_by(is_admin=False).order_by(UserAcc.total_points.desc(), UserAcc.name).all()
-    
-    # Get word counts for all users in one query
-    from sqlalchemy import func
-    word_counts = db.session.query(
-        UserWords.user_id,
-        func.count(UserWords.word_id).label('word_count')
-    ).group_by(UserWords.user_id).all()
-    
-    # Convert to dictionary for easy lookup
-    word_count_dict = {user_id: count for user_id, count in word_counts}
-    
-    # Prepare leaderboard data
-    leaderboard_data = []
-    current_user_word_count = 0
-    user_rank = None
+    # Ranked users come from the in-memory leaderboard (see IN-MEMORY LEADERBOARD)
+    board = get_leaderboard()
+    current_entry = board.get(current_user.user_id)
+    current_user_word_count = current_entry.words if current_entry else 0
+    user_rank = board.rank(current_user.user_id)
     
-    for rank, user in enumerate(users, start=1):
-        word_count = word_count_dict.get(user.user_id, 0)
-        
-        # Store current user's word count
-        if user.user_id == current_user.user_id:
-            current_user_word_count = word_count
-            user_rank = rank
-        
-        leaderboard_data.append({
-            'rank': rank,
-            'user_id': user.user_id,  # ADD THIS LINE
-            'username': user.name,
-            'profile_picture': user.profile_picture,
-            'score': user.total_points or 0,
-            'words': word_count,
-            'is_current_user': user.user_id == current_user.user_id
-        })
+    # Only the first screen is rendered; the page fetches the rest from /api/leaderboard
+    first_page = leaderboard_page(board, None, LEADERBOARD_PAGE_SIZE, current_user.user_id)
+    leaderboard_data = first_page['entries']
     
     # Get top 3 for podium
     podium_users = leaderboard_data[:3] if leaderboard_data else []
     
+    # Show the user's own neighbourhood when they are beyond the first screen
+    around_me = []
+    if user_rank and user_rank > LEADERBOARD_PAGE_SIZE:
+        around_me = [leaderboard_entry_dict(rank, entry, current_user.user_id)
+                     for rank, entry in board.around(current_user.user_id, 2)]
+    
     return render_template('leaderboard.html',
                          current_user=current_user,
                          current_user_word_count=current_user_word_count,
-                         user_rank=user_rank or len(users) + 1,
+                         user_rank=user_rank or len(board) + 1,
                          podium_users=podium_users,
-                         leaderboard_data=leaderboard_data)
+                         leaderboard_data=leaderboard_data,
+                         next_cursor=first_page['next_cursor'],
+                         around_me=around_me)
     
 @app.route('/profile/<int:user_id>')
 def view_profile(user_id):
@@ -2240,30 +4547,22 @@ def view_profile(user_id):
         .filter_by(user_id=user_id)\
         .distinct().count()
     
+    catalog = get_catalog()
     viewed_partner = None
     if viewed_user.pokemon_id:
-        viewed_partner = Pokemon.query.get(viewed_user.pokemon_id)
+        viewed_partner = catalog.get_pokemon(viewed_user.pokemon_id)
     
     viewed_words_learned = UserWords.query.filter_by(user_id=user_id).count()
     
-    viewed_achievements = UserAchievement.query\
-        .filter_by(user_id=user_id)\
-        .join(Achievement, UserAchievement.achievement_id == Achievement.achievement_id)\
-        .all()
-    
-    viewed_achievements_dict = {ua.achievement_id: ua for ua in viewed_achievements}
+    all_achievements = get_achievement_view(user_id)
     
-    all_achievements = Achievement.query.all()
+    viewed_achievements_dict = {a['achievement_id']: a for a in all_achievements}
     
-    achievement_pokemon = {}
-    for achievement in all_achievements:
-        if achievement.pokemon_id:
-            pokemon = Pokemon.query.get(achievement.pokemon_id)
-            if pokemon:
-                achievement_pokemon[achievement.achievement_id] = {
-                    'name': pokemon.name,
-                    'url': pokemon.url
-                }
+    achievement_pokemon = {
+        a['achievement_id']: {'name': a['pokemon_name'], 'url': a['pokemon_url']}
+        for a in all_achievements
+        if a['pokemon_url']
+    }
     
     return render_template('view_profile.html',
         user=viewed_user,
@@ -2341,36 +4640,33 @@ def add_word():
         
         # Update user's total points (10 points per word)
         user.total_points += 10
+        bump_user_stats(user.user_id, words_learned=1, exp_earned=10)
+        record_learning_activity(user)
         db.session.commit()
+        update_leaderboard(user, words_learned=1)
         
-        # CHECK ACHIEVEMENTS AFTER ADDING A WORD
-        check_and_update_achievements(user)
-        
-        # Check for Pokémon evolution
-        evolved, old_pokemon, new_pokemon = check_and_update_pokemon_evolution(user)
+        # CHECK ACHIEVEMENTS AND POKÉMON EVOLUTION AFTER ADDING A WORD
+        # (an evolution shows up as a notification)
+        enqueue_user_evaluation(user.user_id)
         
-        if evolved:
-            flash(f'Word added successfully! {old_pokemon} evolved into {new_pokemon}! 🎉', 'success')
-        else:
-            flash(f'Word added successfully! +10 EXP', 'success')
+        flash(f'Word added successfully! +10 EXP', 'success')
         
         return redirect(url_for('add_word'))
     
     # Get current Pokémon for display
+    catalog = get_catalog()
     current_pokemon = None
     if user.pokemon_id:
-        current_pokemon = Pokemon.query.get(user.pokemon_id)
+        current_pokemon = catalog.get_pokemon(user.pokemon_id)
     
     # Calculate progress data
     progress_data = None
     if current_pokemon:
         # Get next evolution
-        next_evolution = (
-            Pokemon.query
-            .filter_by(family_id=current_pokemon.family_id)
-            .filter(Pokemon.min_points_required > current_pokemon.min_points_required)
-            .order_by(Pokemon.min_points_required)
-            .first()
+        next_evolution = next(
+            (p for p in catalog.pokemon_by_family.get(current_pokemon.family_id, ())
+             if p.min_points_required > current_pokemon.min_points_required),
+            None
         )
         
         if next_evolution:
@@ -2432,20 +4728,8 @@ def multichoi():
     user_id = session['user_id']
     
     try:
-        # Get words that the user has already learned
-        user_learned_word_ids = [word.word_id for word in UserWords.query.filter_by(user_id=user_id).all()]
-        
-        # If user has learned words, get words they haven't learned yet
-        # Otherwise, get all words
-        if user_learned_word_ids:
-            words = Vocabulary.query.filter(~Vocabulary.word_id.in_(user_learned_word_ids)).all()
-        else:
-            words = Vocabulary.query.all()
-        
-        # Shuffle and limit to 20 words for multiple choice
-        import random
-        random.shuffle(words)
-        words = words[:20]
+        # Get 20 random words the user hasn't learned yet for multiple choice
+        words = sample_unlearned_words(user_id, 20)
         
         # Convert to list of dictionaries
         words_data = []
@@ -2476,20 +4760,8 @@ def matchingtype():
     user_id = session['user_id']
     
     try:
-        # Get words that the user has already learned
-        user_learned_word_ids = [word.word_id for word in UserWords.query.filter_by(user_id=user_id).all()]
-        
-        # If user has learned words, get words they haven't learned yet
-        # Otherwise, get all words
-        if user_learned_word_ids:
-            words = Vocabulary.query.filter(~Vocabulary.word_id.in_(user_learned_word_ids)).all()
-        else:
-            words = Vocabulary.query.all()
-        
-        # Shuffle and limit to 12 words for matching game
-        import random
-        random.shuffle(words)
-        words = words[:12]
+        # Get 12 random words the user hasn't learned yet for the matching game
+        words = sample_unlearned_words(user_id, 12)
         
         word_pairs = []
         for word in words:
@@ -2604,7 +4876,7 @@ def admin_dashboard():
     
     for user_achievement in recent_achievements:
         user = UserAcc.query.get(user_achievement.user_id)
-        ach = Achievement.query.get(user_achievement.achievement_id)
+        ach = get_catalog().get_achievement(user_achievement.achievement_id)
         if user and ach:
             recent_activities.append({
                 "text": f"User {user.name} unlocked achievement '{ach.name}'",
@@ -2635,7 +4907,7 @@ def admin_dashboard():
     ).limit(3).all()
     
     for user in evolved_users:
-        pokemon = Pokemon.query.get(user.pokemon_id)
+        pokemon = get_catalog().get_pokemon(user.pokemon_id)
         if pokemon:
             evolutions = user.total_points // 50  # evolve every 50 EXP
             if evolutions > 0:
@@ -2804,7 +5076,7 @@ def admin_users():
         # Get Pokémon name if exists
         pokemon_name = None
         if user.pokemon_id:
-            pokemon = Pokemon.query.get(user.pokemon_id)
+            pokemon = get_catalog().get_pokemon(user.pokemon_id)
             pokemon_name = pokemon.name if pokemon else None
         if user.pokemon_name:
             pokemon_name = user.pokemon_name
@@ -2850,7 +5122,7 @@ def admin_users():
             # Get Pokémon name
             pokemon_name = 'None'
             if user.pokemon_id:
-                pokemon = Pokemon.query.get(user.pokemon_id)
+                pokemon = get_catalog().get_pokemon(user.pokemon_id)
                 pokemon_name = pokemon.name if pokemon else 'None'
             if user.pokemon_name:
                 pokemon_name = user.pokemon_name
@@ -2957,36 +5229,31 @@ def add_achievement():
         if existing_pokemon_achievement:
             return jsonify({'success': False, 'error': 'An achievement with this Pokémon reward already exists'}), 409
         
+        # Validate the metric that drives progress
+        metric = data.get('metric') or None
+        if metric and metric not in ACHIEVEMENT_METRICS:
+            return jsonify({'success': False, 'error': f'Unknown metric: {metric}'}), 400
+        
         # Create new achievement
         new_achievement = Achievement(
             name=data['name'],
             pokemon_id=data['pokemon_id'],
             description=data['description'],
             requirement=data['requirement'],
-            points_reward=data.get('points_reward', 0)
+            points_reward=data.get('points_reward', 0),
+            metric=metric
         )
         
         db.session.add(new_achievement)
-        db.session.flush()  # Get the achievement_id without committing
-        
-        # Get all non-admin users
-        all_users = UserAcc.query.filter_by(is_admin=False).all()
-        
-        # Create UserAchievement entries for each user
-        for user in all_users:
-            user_achievement = UserAchievement(
-                user_id=user.user_id,
-                achievement_id=new_achievement.achievement_id,
-                current_progress=0,
-                date_earned=None  # Not earned yet
-            )
-            db.session.add(user_achievement)
-        
+        invalidate_catalog()
         db.session.commit()
         
+        # Create UserAchievement entries for every non-admin user in chunks
+        created = backfill_achievement_progress(new_achievement.achievement_id)
+        
         return jsonify({
             'success': True,
-            'message': f'Achievement added successfully. Created progress entries for {len(all_users)} users.',
+            'message': f'Achievement added successfully. Created progress entries for {created} users.',
             'achievement_id': new_achievement.achievement_id
         })
         
@@ -2995,6 +5262,81 @@ def add_achievement():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+def backfill_achievement_progress(achievement_id, chunk_size=1000):
+    """Create missing progress rows for an achievement with one INSERT ... SELECT per user chunk.
+
+    Each chunk commits on its own so the SQLite write lock is released between
+    chunks, and memory stays bounded whatever the number of users.
+    """
+    created = 0
+    
+    for first_id, last_id in iter_user_id_ranges(chunk_size, non_admin_only=True):
+        result = db.session.execute(text("""
+            INSERT INTO user_achievement (user_id, achievement_id, current_progress, date_earned)
+            SELECT u.user_id, :achievement_id, 0, NULL
+            FROM user_acc u
+            WHERE u.user_id BETWEEN :first_id AND :last_id AND u.is_admin = 0
+            ON CONFLICT (user_id, achievement_id) DO NOTHING
+        """), {'achievement_id': achievement_id, 'first_id': first_id, 'last_id': last_id})
+        db.session.commit()
+        
+        created += result.rowcount
+        print(f"Achievement {achievement_id}: progress rows created for users {first_id}-{last_id} ({created} so far)")
+    
+    return created
+
+
+def recompute_achievement_progress(achievement_ids=None, chunk_size=1000):
+    """Rebuild progress for every non-admin user from the metric table, one chunk at a time.
+
+    Each chunk is a single INSERT ... SELECT over users x achievements, so progress
+    is correct as soon as the chunk commits and no user has to trigger a recompute.
+    Returns (users, rows, seconds).
+    """
+    metric_expression = case(
+        *[(Achievement.metric == name, expression) for name, expression in ACHIEVEMENT_METRICS.items()],
+        else_=0
+    )
+    
+    users = rows = 0
+    started = time.perf_counter()
+    
+    for first_id, last_id in iter_user_id_ranges(chunk_size, non_admin_only=True):
+        query = select(
+            UserAcc.user_id, Achievement.achievement_id, metric_expression
+        ).select_from(UserAcc).outerjoin(
+            UserStats, UserStats.user_id == UserAcc.user_id
+        ).join(
+            Achievement, literal(True)
+        ).where(
+            UserAcc.user_id.between(first_id, last_id),
+            UserAcc.is_admin == False
+        )
+        if achievement_ids:
+            query = query.where(Achievement.achievement_id.in_(achievement_ids))
+        
+        stmt = sqlite_insert(UserAchievement).from_select(
+            ['user_id', 'achievement_id', 'current_progress'], query
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id', 'achievement_id'],
+            set_={'current_progress': stmt.excluded.current_progress},
+            where=UserAchievement.current_progress.is_distinct_from(stmt.excluded.current_progress)
+        )
+        result = db.session.execute(stmt)
+        db.session.commit()
+        
+        users += UserAcc.query.filter(
+            UserAcc.user_id.between(first_id, last_id), UserAcc.is_admin == False
+        ).count()
+        rows += result.rowcount
+        elapsed = time.perf_counter() - started
+        print(f"Recomputed achievements for users {first_id}-{last_id}: "
+              f"{users} users, {rows} rows changed, {users / elapsed if elapsed else 0:.0f} users/s")
+    
+    return users, rows, time.perf_counter() - started
+
+
 @app.route('/admin/achievements/delete/<int:achievement_id>', methods=['DELETE'])
 @admin_required
 def delete_achievement(achievement_id):
@@ -3007,6 +5349,7 @@ def delete_achievement(achievement_id):
         
         # Delete the achievement itself
         db.session.delete(achievement)
+        invalidate_catalog()
         db.session.commit()
         
         return jsonify({
@@ -3019,6 +5362,29 @@ def delete_achievement(achievement_id):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@app.route('/admin/achievements/recompute', methods=['POST'])
+@admin_required
+def recompute_achievements():
+    """Rebuild achievement progress for all users"""
+    try:
+        data = request.get_json(silent=True) or {}
+        achievement_ids = data.get('achievement_ids') or None
+        
+        users, rows, seconds = recompute_achievement_progress(achievement_ids)
+        
+        return jsonify({
+            'success': True,
+            'message': f'Recomputed progress for {users} users ({rows} rows changed) in {seconds:.2f}s',
+            'users': users,
+            'rows_changed': rows,
+            'users_per_second': round(users / seconds) if seconds else users
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @app.route('/admin/insert_sample_pokemon')
 @admin_required
 def insert_sample_pokemon():
@@ -3146,6 +5512,7 @@ def insert_sample_pokemon():
                 db.session.add(existing)
                 skipped_count += 1
         
+        invalidate_catalog()
         db.session.commit()
         
         return jsonify({
@@ -3231,24 +5598,38 @@ def update_achievement(achievement_id):
             achievement.pokemon_id = data['pokemon_id']
         if 'description' in data:
             achievement.description = data['description']
-        if 'requirement' in data:
-            # If requirement changes, reset all user progress
-            old_requirement = achievement.requirement
-            new_requirement = data['requirement']
-            
-            if new_requirement != old_requirement:
-                achievement.requirement = new_requirement
-                # Reset progress for all users (optional - you may want to keep their progress)
-                UserAchievement.query.filter_by(achievement_id=achievement_id).update({'current_progress': 0})
+        # Progress only needs rebuilding when the target or the metric changes
+        needs_recompute = False
+        
+        if 'requirement' in data and data['requirement'] != achievement.requirement:
+            achievement.requirement = data['requirement']
+            needs_recompute = True
         
         if 'points_reward' in data:
             achievement.points_reward = data['points_reward']
         
+        if 'metric' in data:
+            metric = data['metric'] or None
+            if metric and metric not in ACHIEVEMENT_METRICS:
+                return jsonify({'success': False, 'error': f'Unknown metric: {metric}'}), 400
+            if metric != achievement.metric:
+                achievement.metric = metric
+                needs_recompute = True
+        
+        invalidate_catalog()
         db.session.commit()
         
+        # Rebuilding every user's progress is too slow for a request. Active users
+        # catch up on their next evaluation; the CLI rebuilds everyone else.
+        message = 'Achievement updated successfully'
+        if needs_recompute:
+            message += (f'. Run "flask recompute-achievements --achievement-id {achievement_id}" '
+                        f'to rebuild progress for every user.')
+        
         return jsonify({
             'success': True,
-            'message': 'Achievement updated successfully'
+            'message': message,
+            'needs_recompute': needs_recompute
         })
         
     except Exception as e:
@@ -3269,7 +5650,8 @@ def get_achievement(achievement_id):
             'description': achievement.description,
             'requirement': achievement.requirement,
             'pokemon_id': achievement.pokemon_id,
-            'points_reward': achievement.points_reward
+            'points_reward': achievement.points_reward,
+            'metric': achievement.metric
         }
     })
    
@@ -3278,19 +5660,32 @@ def get_achievement(achievement_id):
 @admin_required
 def admin_achievements():
     """Achievements management page"""
+    catalog = get_catalog()
+    
+    # Count how many users have each achievement
+    user_counts = dict(
+        db.session.query(UserAchievement.achievement_id, func.count(UserAchievement.user_achievement_id))
+        .group_by(UserAchievement.achievement_id)
+        .all()
+    )
+    
     # Get all achievements with their Pokémon
-    achievements = Achievement.query.all()
-    
-    # Get Pokémon for each achievement
-    for achievement in achievements:
-        achievement.pokemon = Pokemon.query.get(achievement.pokemon_id)
-        # Count how many users have this achievement
-        achievement.user_count = UserAchievement.query.filter_by(
-            achievement_id=achievement.achievement_id
-        ).count()
+    achievements = []
+    for achievement in catalog.achievements:
+        achievements.append({
+            'achievement_id': achievement.achievement_id,
+            'name': achievement.name,
+            'description': achievement.description,
+            'requirement': achievement.requirement,
+            'points_reward': achievement.points_reward,
+            'metric': achievement.metric,
+            'pokemon_id': achievement.pokemon_id,
+            'pokemon': catalog.get_pokemon(achievement.pokemon_id),
+            'user_count': user_counts.get(achievement.achievement_id, 0)
+        })
     
     # Get ONLY achievement Pokémon for the selector (rarity='achievement')
-    achievement_pokemon = Pokemon.query.filter_by(rarity='achievement').all()
+    achievement_pokemon = catalog.pokemon_by_rarity.get('achievement', ())
     
     # Get total achievements count
     total_achievements = len(achievements)
@@ -3299,7 +5694,8 @@ def admin_achievements():
         'achievement_management.html',
         achievements=achievements,
         total_achievements=total_achievements,
-        all_pokemon=achievement_pokemon  # Pass only achievement Pokémon
+        all_pokemon=achievement_pokemon,  # Pass only achievement Pokémon
+        metric_choices=list(ACHIEVEMENT_METRICS)
     )
     
 @app.route('/api/get_user_pokemon', methods=['GET'])
@@ -3311,11 +5707,13 @@ def get_user_pokemon():
             return jsonify({'success': False, 'error': 'Not logged in'}), 401
         requested_user_id = session['user_id']
     
-    user_pokemon = UserPokemon.query.filter_by(user_id=requested_user_id).all()
+    user_pokemon = db.session.query(UserPokemon, Pokemon)\
+        .join(Pokemon, Pokemon.pokemon_id == UserPokemon.pokemon_id)\
+        .filter(UserPokemon.user_id == requested_user_id)\
+        .all()
     
     pokemon_list = []
-    for up in user_pokemon:
-        pokemon = Pokemon.query.get(up.pokemon_id)
+    for up, pokemon in user_pokemon:
         if pokemon:
             pokemon_data = {
                 'pokemon_id': up.pokemon_id,
@@ -3511,6 +5909,7 @@ def insert_achievement_pokemon_data():
             existing.rarity = 'achievement'
             db.session.add(existing)
 
+    invalidate_catalog()
     db.session.commit()
     return f"Achievement Pokémon data inserted/updated successfully! {inserted_count} new Pokémon added."
 
@@ -3521,32 +5920,32 @@ def insert_sample_achievements():
     # First make sure we have achievement Pokémon
     achievement_pokemon = [
         # Word Master achievements
-        ('Word Novice', 'Learn your first 10 words', 10, 50),
-        ('Word Apprentice', 'Master 50 vocabulary words', 50, 100),
-        ('Word Scholar', 'Master 100 vocabulary words', 100, 200),
-        ('Word Master', 'Master 250 vocabulary words', 250, 500),
-        ('Vocabulary King', 'Master 500 vocabulary words', 500, 1000),
+        ('Word Novice', 'Learn your first 10 words', 10, 50, 'words_learned'),
+        ('Word Apprentice', 'Master 50 vocabulary words', 50, 100, 'words_learned'),
+        ('Word Scholar', 'Master 100 vocabulary words', 100, 200, 'words_learned'),
+        ('Word Master', 'Master 250 vocabulary words', 250, 500, 'words_learned'),
+        ('Vocabulary King', 'Master 500 vocabulary words', 500, 1000, 'words_learned'),
         
         # Streak achievements
-        ('Streak Starter', 'Maintain a 3-day learning streak', 3, 50),
-        ('Weekly Warrior', 'Maintain a 7-day learning streak', 7, 100),
-        ('Monthly Master', 'Maintain a 30-day learning streak', 30, 500),
-        ('Dedicated Learner', 'Maintain a 90-day learning streak', 90, 1000),
+        ('Streak Starter', 'Maintain a 3-day learning streak', 3, 50, 'streak'),
+        ('Weekly Warrior', 'Maintain a 7-day learning streak', 7, 100, 'streak'),
+        ('Monthly Master', 'Maintain a 30-day learning streak', 30, 500, 'streak'),
+        ('Dedicated Learner', 'Maintain a 90-day learning streak', 90, 1000, 'streak'),
         
         # Pokémon evolution achievements
-        ('First Evolution', 'Evolve your Pokémon for the first time', 1, 100),
-        ('Evolution Expert', 'Evolve your Pokémon 5 times', 5, 500),
-        ('Master Evolver', 'Evolve your Pokémon 10 times', 10, 1000),
+        ('First Evolution', 'Evolve your Pokémon for the first time', 1, 100, None),
+        ('Evolution Expert', 'Evolve your Pokémon 5 times', 5, 500, None),
+        ('Master Evolver', 'Evolve your Pokémon 10 times', 10, 1000, None),
         
         # Points achievements
-        ('Point Collector', 'Earn 100 total points', 100, 50),
-        ('Point Accumulator', 'Earn 500 total points', 500, 200),
-        ('Point Master', 'Earn 1000 total points', 1000, 500),
+        ('Point Collector', 'Earn 100 total points', 100, 50, 'total_points'),
+        ('Point Accumulator', 'Earn 500 total points', 500, 200, 'total_points'),
+        ('Point Master', 'Earn 1000 total points', 1000, 500, 'total_points'),
         
         # Special achievements
-        ('Daily Learner', 'Learn at least one word every day for a week', 7, 100),
-        ('Quick Learner', 'Learn 10 words in a single day', 10, 150),
-        ('Vocabulary Explorer', 'Learn words from 5 different categories', 5, 200),
+        ('Daily Learner', 'Learn at least one word every day for a week', 7, 100, 'streak'),
+        ('Quick Learner', 'Learn 10 words in a single day', 10, 150, None),
+        ('Vocabulary Explorer', 'Learn words from 5 different categories', 5, 200, None),
     ]
 
     # Get achievement Pokémon from database
@@ -3556,7 +5955,7 @@ def insert_sample_achievements():
         return "No achievement Pokémon found. Please run /insert_achievement_pokemon_data first."
 
     inserted_count = 0
-    for i, (name, description, requirement, points_reward) in enumerate(achievement_pokemon):
+    for i, (name, description, requirement, points_reward, metric) in enumerate(achievement_pokemon):
         # Check if achievement already exists
         existing = Achievement.query.filter_by(name=name).first()
         if not existing:
@@ -3569,11 +5968,13 @@ def insert_sample_achievements():
                 description=description,
                 requirement=requirement,
                 points_reward=points_reward,
-                pokemon_id=pokemon.pokemon_id
+                pokemon_id=pokemon.pokemon_id,
+                metric=metric
             )
             db.session.add(achievement)
             inserted_count += 1
 
+    invalidate_catalog()
     db.session.commit()
     return f"Sample achievements inserted successfully! {inserted_count} new achievements added."
 
@@ -3898,6 +6299,7 @@ def admin_add_pokemon():
         )
         
         db.session.add(new_pokemon)
+        invalidate_catalog()
         db.session.commit()
         
         return jsonify({
@@ -3937,6 +6339,7 @@ def admin_update_pokemon(pokemon_id):
         if 'family_id' in data:
             pokemon.family_id = data['family_id']
         
+        invalidate_catalog()
         db.session.commit()
         
         return jsonify({
@@ -3977,6 +6380,7 @@ def admin_delete_pokemon(pokemon_id):
         
         # Delete the Pokémon
         db.session.delete(pokemon)
+        invalidate_catalog()
         db.session.commit()
         
         return jsonify({'success': True, 'message': 'Pokémon deleted successfully'})
@@ -4228,8 +6632,206 @@ def export_analytics():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+# ============ DATABASE MAINTENANCE ============
+# Columns added after the first release: (table, column, column DDL)
+SCHEMA_UPGRADES = [
+    ('achievement', 'metric', 'VARCHAR(30)'),
+    ('user_acc', 'timezone', "VARCHAR(50) DEFAULT 'Asia/Manila'"),
+    ('vocabulary', 'pronunciation', 'VARCHAR(100)'),
+    ('vocabulary', 'part_of_speech', 'VARCHAR(50)'),
+    ('vocabulary', 'enriched_at', 'DATETIME'),
+]
+
+# Indexes whose definition changed (the replacements carry new names) or that nothing reads any more
+DROPPED_INDEXES = [
+    'ix_user_acc_last_login',
+    'ix_user_acc_streak',
+    'ix_user_acc_rank',
+    'ix_user_acc_player_rank',
+]
+
+
+def upgrade_schema():
+    """Bring an existing SQLite database up to date with the models."""
+    inspector = db.inspect(db.engine)
+    
+    for table, column, ddl in SCHEMA_UPGRADES:
+        existing_columns = {c['name'] for c in inspector.get_columns(table)}
+        if column not in existing_columns:
+            db.session.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {ddl}'))
+            print(f"✅ Added column {table}.{column}")
+    
+    # Keep a single progress row per user/achievement (earned rows win) before indexing
+    db.session.execute(text("""
+        DELETE FROM user_achievement
+        WHERE user_achievement_id NOT IN (
+            SELECT (
+                SELECT ua2.user_achievement_id FROM user_achievement ua2
+                WHERE ua2.user_id = ua.user_id AND ua2.achievement_id = ua.achievement_id
+                ORDER BY ua2.date_earned IS NULL, ua2.user_achievement_id
+                LIMIT 1
+            )
+            FROM user_achievement ua
+            GROUP BY ua.user_id, ua.achievement_id
+        )
+    """))
+    
+    for index_name in DROPPED_INDEXES:
+        db.session.execute(text(f'DROP INDEX IF EXISTS {index_name}'))
+    
+    # Indexes declared on the models but missing from tables created before them
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.session.connection(), checkfirst=True)
+    
+    # Periods snapshotted before snapshotted_period existed
+    db.session.execute(text("""
+        INSERT OR IGNORE INTO snapshotted_period (period_type, period_start, snapshotted_at)
+        SELECT DISTINCT period_type, period_start, CURRENT_TIMESTAMP FROM leaderboard_snapshot
+    """))
+    
+    # Achievements created before metrics existed
+    for achievement in Achievement.query.filter(Achievement.metric.is_(None)).all():
+        achievement.metric = infer_achievement_metric(achievement.name)
+    
+    db.session.commit()
+    
+    # Counters start from the raw tables the first time they exist
+    if UserStats.query.first() is None and UserAcc.query.first() is not None:
+        rebuilt = rebuild_user_stats()
+        print(f"✅ Built counters for {rebuilt} users")
+    
+    if UserActivity.query.first() is None and UserWords.query.first() is not None:
+        rebuilt = rebuild_user_activity()
+        print(f"✅ Built activity history for {rebuilt} users")
+
+
+@app.cli.command('rebuild-user-stats')
+def rebuild_user_stats_command():
+    """Repair per-user counters from UserWords and UserAcc."""
+    started = time.perf_counter()
+    rebuilt = rebuild_user_stats()
+    print(f"Rebuilt counters for {rebuilt} users in {time.perf_counter() - started:.2f}s")
+
+
+@app.cli.command('rebuild-user-activity')
+def rebuild_user_activity_command():
+    """Merge learned-word dates from UserWords into the activity bitmaps."""
+    started = time.perf_counter()
+    rebuilt = rebuild_user_activity()
+    print(f"Rebuilt activity history for {rebuilt} users in {time.perf_counter() - started:.2f}s")
+
+
+@app.cli.command('sweep-streaks')
+@click.option('--chunk-size', default=5000, show_default=True, help='Users per UPDATE.')
+def sweep_streaks_command(chunk_size):
+    """Reset broken streaks for all users. Run hourly from cron so every timezone is covered."""
+    scanned, reset, seconds = sweep_broken_streaks(chunk_size)
+    print(f"Swept {scanned} users, reset {reset} streaks in {seconds:.2f}s "
+          f"({scanned / seconds if seconds else 0:.0f} users/s)")
+
+
+@app.cli.command('schedule-words-of-day')
+@click.option('--days', default=30, show_default=True, help='How many days ahead to schedule.')
+def schedule_words_of_day_command(days):
+    """Write the Word of the Day schedule for the coming days (existing days are kept)."""
+    today = datetime.now(ph_timezone).date()
+    
+    if not schedule_words_of_day(today, days):
+        print("No vocabulary words to schedule.")
+        return
+    
+    print(f"Scheduled Word of the Day from {today} to {today + timedelta(days=days - 1)}")
+
+
+@app.cli.command('enrich-vocabulary')
+@click.option('--workers', default=8, show_default=True, help='Concurrent lookups.')
+@click.option('--rate', default=10.0, show_default=True, help='Maximum lookups per second.')
+@click.option('--batch-size', default=100, show_default=True, help='Words per committed batch.')
+@click.option('--retries', default=3, show_default=True, help='Retries per word on timeouts and 5xx/429.')
+def enrich_vocabulary_command(workers, rate, batch_size, retries):
+    """Fill pronunciation and part of speech for every unenriched vocabulary word."""
+    enriched, failed, seconds = enrich_vocabulary(workers, rate, batch_size, retries)
+    print(f"Enriched {enriched} words, {failed} failed, in {seconds:.2f}s "
+          f"({enriched / seconds if seconds else 0:.1f} words/s)")
+
+
+@app.cli.command('run-scheduler')
+def run_scheduler_command():
+    """Run the reminder scheduler in the foreground (instead of a thread in a web worker)."""
+    print("Reminder scheduler started. Press Ctrl+C to stop.")
+    reminder_scheduler_loop()
+
+
+@app.cli.command('send-reminders')
+@click.option('--inactive-days', default=REENGAGEMENT_INACTIVE_DAYS, show_default=True, help='Days without a login before a re-engagement nudge.')
+@click.option('--chunk-size', default=5000, show_default=True, help='Users per insert transaction.')
+def send_reminders_command(inactive_days, chunk_size):
+    """Create due reminders, re-engagement nudges and streak warnings (safe to run as often as you like)."""
+    started = time.perf_counter()
+    sent = send_scheduled_notifications(chunk_size, inactive_days=inactive_days)
+    print(f"Sent {sent['daily']} daily reminders, {sent['reengagement']} re-engagement nudges and "
+          f"{sent['streak_risk']} streak warnings in {time.perf_counter() - started:.2f}s")
+
+
+@app.cli.command('prune-notifications')
+@click.option('--archive', 'archive_path', type=click.Path(dir_okay=False), help='Append pruned rows to this .jsonl.gz file.')
+@click.option('--chunk-size', default=2000, show_default=True, help='Rows per delete transaction.')
+@click.option('--vacuum', is_flag=True, help='VACUUM afterwards to shrink the database file.')
+def prune_notifications_command(archive_path, chunk_size, vacuum):
+    """Delete expired notifications and keep each user under the per-user cap."""
+    report = prune_notifications(chunk_size, archive_path)
+    print(f"Reclaimed {report['reclaimed']} notifications "
+          f"({report['expired']} expired, {report['over_cap']} over the per-user cap) "
+          f"and {report['broadcasts']} broadcasts in {report['seconds']:.2f}s")
+    
+    if vacuum:
+        db_path = db.engine.url.database
+        size_before = os.path.getsize(db_path)
+        db.session.execute(text('VACUUM'))
+        db.session.commit()
+        print(f"Database file: {size_before / 1024:.0f} KB -> {os.path.getsize(db_path) / 1024:.0f} KB")
+
+
+@app.cli.command('send-broadcast')
+@click.option('--title', required=True, help='Notification title.')
+@click.option('--message', required=True, help='Notification text.')
+@click.option('--expires-in-days', type=int, help='Hide the broadcast after this many days.')
+def send_broadcast_command(title, message, expires_in_days):
+    """Send a notification to every user as a single broadcast row."""
+    broadcast = create_broadcast(title, message, expires_in_days=expires_in_days)
+    print(f"Broadcast {broadcast.broadcast_id} sent")
+
+
+@app.cli.command('snapshot-leaderboards')
+def snapshot_leaderboards_command():
+    """Store the final standings of every finished week and month."""
+    written = snapshot_closed_periods()
+    print(f"Wrote {written} leaderboard snapshot rows")
+
+
+@app.cli.command('recompute-achievements')
+@click.option('--achievement-id', 'achievement_ids', type=int, multiple=True, help='Only recompute these achievements.')
+@click.option('--chunk-size', default=1000, show_default=True, help='Users per transaction.')
+def recompute_achievements_command(achievement_ids, chunk_size):
+    """Rebuild achievement progress for every user from the source tables."""
+    users, rows, seconds = recompute_achievement_progress(list(achievement_ids) or None, chunk_size)
+    print(f"Recomputed {users} users ({rows} rows changed) in {seconds:.2f}s "
+          f"({users / seconds if seconds else 0:.0f} users/s)")
+
+
+@app.cli.command('upgrade-db')
+def upgrade_db_command():
+    """Create missing tables and upgrade the existing schema."""
+    db.create_all()
+    upgrade_schema()
+    print("Database is up to date.")
+
+
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
+        upgrade_schema()
+    start_auto_notifications()
     app.run(debug=True)
 
@@ -0,0 +1,98 @@
+"""Benchmark the in-memory leaderboard on a seeded in-memory database.
+
+    python benchmarks/bench_leaderboard.py --users 1000000
+
+Points are multiples of 10 over 2000 values, so every points value is shared
+by hundreds of users and ranks depend on the name and user_id tie-breaks. A
+sample of ranks is checked against counts made in SQLite.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+from sqlalchemy import and_, func, or_
+
+from Main import encode_leaderboard_cursor, decode_leaderboard_cursor, get_leaderboard, reload_leaderboard, update_leaderboard
+from models import db, UserAcc
+
+
+def seed(users, batch_size=100000):
+    for first in range(1, users + 1, batch_size):
+        db.session.execute(UserAcc.__table__.insert(), [
+            {'user_id': user_id, 'name': f'user{user_id % 5000}', 'email': f'user{user_id}@example.com',
+             'password': 'x', 'is_admin': False, 'total_points': (user_id * 7919 % 2000) * 10,
+             'date_created': datetime.utcnow()}
+            for user_id in range(first, min(first + batch_size, users + 1))
+        ])
+    db.session.commit()
+
+
+def counted_rank(user_id):
+    """Rank from two COUNTs in SQLite, to check the board against."""
+    user = db.session.get(UserAcc, user_id)
+    ahead = db.session.query(func.count(UserAcc.user_id)).filter(UserAcc.is_admin == False, or_(
+        UserAcc.total_points > user.total_points,
+        and_(UserAcc.total_points == user.total_points, or_(
+            UserAcc.name < user.name, and_(UserAcc.name == user.name, UserAcc.user_id < user.user_id)
+        ))
+    )).scalar()
+    return ahead + 1
+
+
+def timed_each(function, arguments):
+    """Average microseconds per call."""
+    started = time.perf_counter()
+    for argument in arguments:
+        function(argument)
+    return (time.perf_counter() - started) / len(arguments) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000000)
+    parser.add_argument('--samples', type=int, default=10000)
+    args = parser.parse_args()
+    
+    rng = random.Random(1)
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        seed(args.users)
+        print(f"Seeded {args.users} users in {time.perf_counter() - started:.2f}s")
+        
+        started = time.perf_counter()
+        board = get_leaderboard()
+        print(f"First load: {len(board)} users in {time.perf_counter() - started:.2f}s")
+        
+        for user_id in rng.sample(range(1, args.users + 1), 10):
+            assert board.rank(user_id) == counted_rank(user_id), f"rank of user {user_id} is off"
+        
+        user_ids = [rng.randint(1, args.users) for _ in range(args.samples)]
+        cursors = [encode_leaderboard_cursor(board.get(user_id)) for user_id in user_ids]
+        print(f"rank:      {timed_each(board.rank, user_ids):.1f}us")
+        print(f"around(3): {timed_each(lambda user_id: board.around(user_id, 3), user_ids):.1f}us")
+        print(f"page(50):  {timed_each(lambda cursor: board.after(decode_leaderboard_cursor(cursor), 50), cursors):.1f}us")
+        
+        # Points changes as add_word applies them after its commit
+        users = [UserAcc(user_id=user_id, name=board.get(user_id).name, profile_picture=None, is_admin=False,
+                         total_points=board.get(user_id).points + 10) for user_id in user_ids]
+        print(f"update:    {timed_each(lambda user: update_leaderboard(user, words_learned=1), users):.1f}us")
+        for user in users[:10]:
+            assert board.rank(user.user_id) == board.keys.bisect_left((-user.total_points, user.name, user.user_id)) + 1
+        
+        started = time.perf_counter()
+        reload_leaderboard()
+        print(f"Reload with {args.samples} logged changes replayed: {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
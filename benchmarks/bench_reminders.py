@@ -0,0 +1,101 @@
+"""Benchmark the reminder generators on a seeded in-memory database.
+
+    python benchmarks/bench_reminders.py --users 300000
+
+Users are spread over several timezones. Most logged in during the last
+week; a few stopped logging in or never did (re-engagement targets), and
+some have a live streak but have not learned today (streak warnings). The
+pass runs at 11:00 UTC, so Manila and Tokyo are in their evening, London in
+its daytime window and the Americas and Auckland outside both. Each
+generator runs twice; the second run finds every reminder already sent.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytz
+from flask import Flask
+
+from Main import (REMINDER_END_HOUR, REMINDER_START_HOUR, REENGAGEMENT_INACTIVE_DAYS, ph_timezone,
+                  send_daily_reminders, send_reengagement_reminders, send_streak_risk_reminders)
+from models import db, UserAcc, UserActivity
+
+TIMEZONES = ['Asia/Manila', 'America/New_York', 'Europe/London', 'Asia/Tokyo', 'Pacific/Auckland', 'America/Los_Angeles']
+
+
+def seed(users, now):
+    now_ph = pytz.utc.localize(now).astimezone(ph_timezone).replace(tzinfo=None)
+    rows, activities = [], []
+    for user_id in range(1, users + 1):
+        timezone = TIMEZONES[user_id % len(TIMEZONES)]
+        today = pytz.utc.localize(now).astimezone(pytz.timezone(timezone)).date().toordinal()
+        
+        n = user_id // len(TIMEZONES)  # so every timezone gets the same mix
+        if n % 50 == 0:
+            last_login = None  # never logged in
+        elif n % 50 < 4:
+            last_login = now_ph - timedelta(days=8 + n % 30)  # stopped logging in
+        else:
+            last_login = now_ph - timedelta(hours=n % 150)
+        streak = n % 7 if n % 3 else 0
+        last_active_day = today - (n % 4 == 0)  # a quarter learned yesterday but not today
+        
+        rows.append({'user_id': user_id, 'name': f'user{user_id}', 'email': f'user{user_id}@example.com',
+                     'password': 'x', 'is_admin': False, 'is_active': True, 'timezone': timezone,
+                     'current_streak': streak, 'last_login': last_login,
+                     'date_created': now - timedelta(days=60)})
+        activities.append({'user_id': user_id, 'base_day': last_active_day, 'bits': b'\x01',
+                           'last_active_day': last_active_day})
+    db.session.execute(UserAcc.__table__.insert(), rows)
+    db.session.execute(UserActivity.__table__.insert(), activities)
+    db.session.commit()
+
+
+def expected_reengagement(now):
+    login_cutoff = pytz.utc.localize(now).astimezone(ph_timezone).replace(tzinfo=None) - timedelta(days=REENGAGEMENT_INACTIVE_DAYS)
+    window = {name for name in TIMEZONES
+              if REMINDER_START_HOUR <= pytz.utc.localize(now).astimezone(pytz.timezone(name)).hour < REMINDER_END_HOUR}
+    return sum(1 for user in db.session.query(UserAcc.timezone, UserAcc.last_login)
+               if user.timezone in window and (user.last_login is None or user.last_login < login_cutoff))
+
+
+def timed(function, now, chunk_size):
+    started = time.perf_counter()
+    created = function(chunk_size=chunk_size, now=now)
+    return created, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=300000)
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    args = parser.parse_args()
+    
+    now = datetime.utcnow().replace(hour=11, minute=0, second=0, microsecond=0)
+    
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        seed(args.users, now)
+        print(f"Seeded {args.users} users in {time.perf_counter() - started:.2f}s")
+        
+        expected = expected_reengagement(now)
+        for function in (send_reengagement_reminders, send_streak_risk_reminders, send_daily_reminders):
+            created, seconds = timed(function, now, args.chunk_size)
+            again, again_seconds = timed(function, now, args.chunk_size)
+            print(f"{function.__name__}: {created} created in {seconds:.2f}s, "
+                  f"rerun created {again} in {again_seconds:.2f}s")
+            assert again == 0, f"{function.__name__} is not idempotent"
+            if function is send_reengagement_reminders:
+                assert created == expected, f"expected {expected} re-engagement nudges, got {created}"
+
+
+if __name__ == '__main__':
+    main()
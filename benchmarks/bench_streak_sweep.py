@@ -0,0 +1,72 @@
+"""Benchmark sweep_broken_streaks on a seeded in-memory database.
+
+    python benchmarks/bench_streak_sweep.py --users 300000
+
+Users are spread over several timezones; a third learned today, a third
+yesterday (streak still alive) and a third earlier (streak broken).
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+
+from Main import activity_day, resolve_timezone, sweep_broken_streaks
+from models import db, UserAcc, UserActivity
+
+TIMEZONES = ['Asia/Manila', 'America/New_York', 'Europe/London', 'Asia/Tokyo', 'Pacific/Auckland', 'America/Los_Angeles']
+
+
+def seed(users):
+    rows, activities = [], []
+    for user_id in range(1, users + 1):
+        timezone = TIMEZONES[user_id % len(TIMEZONES)]
+        today = activity_day(tz=resolve_timezone(timezone))
+        last_active_day = today - (user_id % 3) * (1 + user_id % 5)  # today, yesterday-ish, or long ago
+        rows.append({'user_id': user_id, 'name': f'user{user_id}', 'email': f'user{user_id}@example.com',
+                     'password': 'x', 'is_admin': False, 'timezone': timezone, 'current_streak': 5,
+                     'date_created': datetime.utcnow()})
+        activities.append({'user_id': user_id, 'base_day': last_active_day, 'bits': b'\x01',
+                           'last_active_day': last_active_day})
+    db.session.execute(UserAcc.__table__.insert(), rows)
+    db.session.execute(UserActivity.__table__.insert(), activities)
+    db.session.commit()
+
+
+def expected_resets():
+    broken = 0
+    for user in db.session.query(UserAcc.timezone, UserActivity.last_active_day).join(
+            UserActivity, UserActivity.user_id == UserAcc.user_id):
+        if user.last_active_day < activity_day(tz=resolve_timezone(user.timezone)) - 1:
+            broken += 1
+    return broken
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=300000)
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    args = parser.parse_args()
+    
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        seed(args.users)
+        print(f"Seeded {args.users} users in {time.perf_counter() - started:.2f}s")
+        
+        expected = expected_resets()
+        scanned, reset, seconds = sweep_broken_streaks(args.chunk_size)
+        print(f"Swept {scanned} users, reset {reset} streaks in {seconds:.2f}s "
+              f"({scanned / seconds if seconds else 0:.0f} users/s)")
+        assert reset == expected, f"expected {expected} resets, got {reset}"
+
+
+if __name__ == '__main__':
+    main()
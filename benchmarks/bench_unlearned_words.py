@@ -0,0 +1,97 @@
+"""Benchmark the "words the user hasn't learned yet" queries on a seeded in-memory database.
+
+    python benchmarks/bench_unlearned_words.py --learned 100000
+
+One user has learned --learned words out of a vocabulary with --unlearned
+more; other users have learned a slice of the vocabulary each. Compares
+sample_unlearned_words and pick_word_of_day (NOT EXISTS through
+ix_user_words_user_word) with loading the user's word ids into Python.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+
+from Main import pick_word_of_day, sample_unlearned_words
+from models import db, UserAcc, UserWords, Vocabulary
+
+USER_ID = 1
+OTHER_USERS = 20
+
+
+def seed(learned, unlearned, batch_size=50000):
+    words = learned + unlearned
+    db.session.execute(UserAcc.__table__.insert(), [
+        {'user_id': user_id, 'name': f'user{user_id}', 'email': f'user{user_id}@example.com', 'password': 'x'}
+        for user_id in range(1, OTHER_USERS + 2)
+    ])
+    db.session.execute(Vocabulary.__table__.insert(), [
+        {'word_id': word_id, 'word': f'word{word_id}', 'points_value': 10, 'is_word_of_day': word_id % 10 == 0}
+        for word_id in range(1, words + 1)
+    ])
+    
+    # The user learned a random learned-sized subset; everyone else a contiguous slice
+    rng = random.Random(1)
+    rows = [(USER_ID, word_id) for word_id in rng.sample(range(1, words + 1), learned)]
+    for user_id in range(2, OTHER_USERS + 2):
+        first = (user_id * 7919) % words
+        rows += [(user_id, (first + i) % words + 1) for i in range(min(5000, words))]
+    for start in range(0, len(rows), batch_size):
+        db.session.execute(UserWords.__table__.insert(), [
+            {'user_id': user_id, 'word_id': word_id, 'date_learned': datetime.utcnow()}
+            for user_id, word_id in rows[start:start + batch_size]
+        ])
+    db.session.commit()
+
+
+def load_in_python(limit):
+    """The replaced approach: the user's word ids in a set, filtered against every word."""
+    learned = {word_id for (word_id,) in db.session.query(UserWords.word_id).filter_by(user_id=USER_ID)}
+    candidates = [word for word in Vocabulary.query.all() if word.word_id not in learned]
+    return random.sample(candidates, min(limit, len(candidates)))
+
+
+def timed(function, runs):
+    """(last result, average milliseconds per run)."""
+    started = time.perf_counter()
+    for _ in range(runs):
+        result = function()
+        db.session.expunge_all()
+    return result, (time.perf_counter() - started) / runs * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--learned', type=int, default=100000)
+    parser.add_argument('--unlearned', type=int, default=20000)
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+    
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        seed(args.learned, args.unlearned)
+        print(f"Seeded {args.learned} learned and {args.unlearned} unlearned words in {time.perf_counter() - started:.2f}s")
+        
+        learned = {word_id for (word_id,) in db.session.query(UserWords.word_id).filter_by(user_id=USER_ID)}
+        for name, function in (
+            ('sample_unlearned_words(20)', lambda: sample_unlearned_words(USER_ID, 20)),
+            ('pick_word_of_day', lambda: [pick_word_of_day(date.today(), exclude_user_id=USER_ID)]),
+            ('load ids into Python (20)', lambda: load_in_python(20)),
+        ):
+            words, ms = timed(function, args.runs)
+            assert words and not any(word.word_id in learned for word in words), f"{name} returned a learned word"
+            print(f"{name}: {ms:.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
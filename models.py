@@ -1,5 +1,6 @@
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import text
 
 
 db = SQLAlchemy()
@@ -23,6 +24,7 @@ class Achievement(db.Model):
     description = db.Column(db.Text)
     points_reward = db.Column(db.Integer, default=0)
     requirement = db.Column(db.Integer,default=0)
+    metric = db.Column(db.String(30))  # e.g., 'words_learned', 'total_points', 'logged_out', 'streak'
 
 
 # ---------------- USER TABLE ----------------
@@ -42,7 +44,16 @@ class UserAcc(db.Model):
     current_streak = db.Column(db.Integer, default=0)
     longest_streak = db.Column(db.Integer, default=0)
     total_points = db.Column(db.Integer, default=0)  # Pokémon EXP
+    timezone = db.Column(db.String(50), default='Asia/Manila')  # Day boundaries for streaks and reminders
     collected_pokemon = db.relationship('UserPokemon', backref='owner', lazy=True, cascade='all, delete-orphan')
+
+    # Reminder targeting (timezone, last_login, current_streak).
+    # Partial on non-admins so user_id range chunks still walk the primary key.
+    __table_args__ = (
+        db.Index('ix_user_acc_player_timezone', 'timezone', 'user_id', sqlite_where=text('is_admin = 0')),
+        db.Index('ix_user_acc_player_last_login', 'last_login', sqlite_where=text('is_admin = 0')),
+        db.Index('ix_user_acc_player_streak', 'current_streak', sqlite_where=text('is_admin = 0')),
+    )
     
 class UserPokemon(db.Model):
     user_pokemon_id = db.Column(db.Integer, primary_key=True)
@@ -64,6 +75,9 @@ class Vocabulary(db.Model):
     category = db.Column(db.String(50))
     points_value = db.Column(db.Integer, default=10)
     is_word_of_day = db.Column(db.Boolean, default=False)
+    pronunciation = db.Column(db.String(100))
+    part_of_speech = db.Column(db.String(50))
+    enriched_at = db.Column(db.DateTime)  # Set once dictionary data has been looked up (even if none was found)
 
 
 # ---------------- USER WORDS TABLE ----------------
@@ -73,6 +87,64 @@ class UserWords(db.Model):
     word_id = db.Column(db.Integer, db.ForeignKey('vocabulary.word_id'), nullable=False)
     date_learned = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # "Has this user learned this word?" lookups (anti-joins from Vocabulary)
+    __table_args__ = (db.Index('ix_user_words_user_word', 'user_id', 'word_id'),)
+
+
+# ---------------- USER STATS TABLE ----------------
+class UserStats(db.Model):
+    # Running counters updated with small deltas by the routes that change them
+    user_id = db.Column(db.Integer, db.ForeignKey('user_acc.user_id'), primary_key=True)
+    words_learned = db.Column(db.Integer, nullable=False, default=0)
+    exp_earned = db.Column(db.Integer, nullable=False, default=0)
+    sessions_completed = db.Column(db.Integer, nullable=False, default=0)
+    logouts = db.Column(db.Integer, nullable=False, default=0)
+
+
+
+# ---------------- PERIOD STATS TABLES ----------------
+class UserPeriodStats(db.Model):
+    # EXP and words per user per week/month (Philippine calendar), bumped with UserStats
+    user_id = db.Column(db.Integer, db.ForeignKey('user_acc.user_id'), primary_key=True)
+    period_type = db.Column(db.String(10), primary_key=True)  # 'week' (starts Monday) or 'month'
+    period_start = db.Column(db.Date, primary_key=True)
+    exp_earned = db.Column(db.Integer, nullable=False, default=0)
+    words_learned = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_user_period_stats_board', 'period_type', 'period_start', 'exp_earned'),
+    )
+
+
+class LeaderboardSnapshot(db.Model):
+    # Final standings of a closed week/month, written once so history is a plain read
+    period_type = db.Column(db.String(10), primary_key=True)
+    period_start = db.Column(db.Date, primary_key=True)
+    rank = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    name = db.Column(db.String(50), nullable=False)
+    exp_earned = db.Column(db.Integer, nullable=False, default=0)
+    words_learned = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_leaderboard_snapshot_user', 'user_id', 'period_type', 'period_start'),
+    )
+
+
+class SnapshottedPeriod(db.Model):
+    # Closed periods already copied into leaderboard_snapshot, including ones with no ranked users
+    period_type = db.Column(db.String(10), primary_key=True)
+    period_start = db.Column(db.Date, primary_key=True)
+    snapshotted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+# ---------------- USER ACTIVITY TABLE ----------------
+class UserActivity(db.Model):
+    # One bit per day (bit i = base_day + i, day numbers are date ordinals) set by any learning action
+    user_id = db.Column(db.Integer, db.ForeignKey('user_acc.user_id'), primary_key=True)
+    base_day = db.Column(db.Integer, nullable=False)
+    bits = db.Column(db.LargeBinary, nullable=False, default=b'')
+    last_active_day = db.Column(db.Integer)
 
 # ---------------- USER ACHIEVEMENTS TABLE ----------------
 class UserAchievement(db.Model):
@@ -82,6 +154,9 @@ class UserAchievement(db.Model):
     current_progress = db.Column(db.Integer, default=0)
     date_earned = db.Column(db.DateTime)
 
+    # One progress row per user and achievement so progress can be upserted in one batch
+    __table_args__ = (db.Index('ix_user_achievement_user_achievement', 'user_id', 'achievement_id', unique=True),)
+
 
 # ---------------- NOTIFICATION TABLE ----------------  
 class Notification(db.Model):
@@ -91,4 +166,71 @@ class Notification(db.Model):
     message = db.Column(db.Text, nullable=False)
     notification_type = db.Column(db.String(50), nullable=False)  # e.g., 'achievement', 'streak', 'level_up', 'pokemon', 'reminder'
     is_read = db.Column(db.Boolean, default=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Per-user feeds, delta polls (id > since_id), unread counts, retention sweeps
+    # and the "already sent one today?" checks of the reminder generators
+    __table_args__ = (
+        db.Index('ix_notification_user_id', 'user_id', 'notification_id'),
+        db.Index('ix_notification_user_unread', 'user_id', 'is_read'),
+        db.Index('ix_notification_type_created', 'notification_type', 'created_at'),
+        db.Index('ix_notification_user_type', 'user_id', 'notification_type', 'created_at'),
+    )
+
+
+# ---------------- BROADCAST TABLES ----------------
+class Broadcast(db.Model):
+    # An announcement to every user, stored once. Read state lives in BroadcastCursor.
+    broadcast_id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(100), nullable=False)
+    message = db.Column(db.Text, nullable=False)
+    notification_type = db.Column(db.String(50), nullable=False, default='announcement')
+    created_by = db.Column(db.Integer, db.ForeignKey('user_acc.user_id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime)  # Hidden (and pruned) after this; None keeps it until retention
+
+    # Ids must never be reused, or a new broadcast could fall below users' watermarks
+    __table_args__ = {'sqlite_autoincrement': True}
+
+
+class BroadcastCursor(db.Model):
+    # Per-user watermarks: broadcasts up to read_through_id are read, up to cleared_through_id are hidden
+    user_id = db.Column(db.Integer, db.ForeignKey('user_acc.user_id'), primary_key=True)
+    read_through_id = db.Column(db.Integer, nullable=False, default=0)
+    cleared_through_id = db.Column(db.Integer, nullable=False, default=0)
+
+
+# ---------------- EVALUATION JOB TABLE ----------------
+class EvaluationJob(db.Model):
+    # Pending "re-evaluate user X" work. One row per user, so repeated requests coalesce.
+    job_id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user_acc.user_id'), unique=True, nullable=False)
+    requested_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    claimed_at = db.Column(db.DateTime)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+
+
+# ---------------- CATALOG VERSION TABLE ----------------
+class CatalogVersion(db.Model):
+    # Bumped whenever achievements or Pokémon change so every process reloads its cached catalog
+    catalog_id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+# ---------------- DICTIONARY ENTRY TABLE ----------------
+class DictionaryEntry(db.Model):
+    # Cached dictionary API lookups keyed by normalized word; found=False caches a 404
+    word = db.Column(db.String(100), primary_key=True)
+    found = db.Column(db.Boolean, nullable=False, default=True)
+    pronunciation = db.Column(db.String(100))
+    part_of_speech = db.Column(db.String(50))
+    definitions = db.Column(db.Text)  # JSON list of {"part_of_speech", "definition", "example"}
+    fetched_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+
+# ---------------- WORD OF THE DAY SCHEDULE TABLE ----------------
+class WordOfDaySchedule(db.Model):
+    # The Word of the Day for each Philippine date; once written, a day's pick never changes
+    date = db.Column(db.Date, primary_key=True)
+    word_id = db.Column(db.Integer, db.ForeignKey('vocabulary.word_id'), nullable=False)
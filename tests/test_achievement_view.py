@@ -0,0 +1,71 @@
+from datetime import datetime
+
+import pytest
+from flask import Flask
+from sqlalchemy import event
+
+from Main import get_achievement_view
+from models import db, UserAcc, Pokemon, Achievement, UserAchievement
+
+
+@pytest.fixture
+def app():
+    """A throwaway app bound to an in-memory SQLite database."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+def seed(users, achievements):
+    db.session.add(Pokemon(pokemon_id=1, name='Bulbasaur', url='bulbasaur.png', family_id=1))
+    for user_id in range(1, users + 1):
+        db.session.add(UserAcc(user_id=user_id, name=f'user{user_id}', email=f'user{user_id}@example.com', password='x'))
+    for achievement_id in range(1, achievements + 1):
+        db.session.add(Achievement(achievement_id=achievement_id, pokemon_id=1, name=f'Achievement {achievement_id}',
+                                   points_reward=10, requirement=achievement_id, metric='words_learned'))
+        for user_id in range(1, users + 1):
+            db.session.add(UserAchievement(user_id=user_id, achievement_id=achievement_id, current_progress=user_id,
+                                           date_earned=datetime.utcnow() if achievement_id == 1 else None))
+    db.session.commit()
+
+
+def count_queries(user_id):
+    statements = []
+    
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+    
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        view = get_achievement_view(user_id)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return len(statements), view
+
+
+@pytest.mark.parametrize('users, achievements', [(1, 1), (5, 10), (20, 60)])
+def test_achievement_view_runs_one_query(app, users, achievements):
+    seed(users, achievements)
+    
+    queries, view = count_queries(user_id=users)
+    
+    assert queries == 1
+    assert len(view) == achievements
+    assert view[0]['is_earned'] and view[0]['pokemon_name'] == 'Bulbasaur'
+    assert all(a['user_progress'] == users for a in view)
+
+
+def test_achievement_view_for_user_without_progress(app):
+    seed(users=3, achievements=5)
+    db.session.add(UserAcc(user_id=99, name='newcomer', email='new@example.com', password='x'))
+    db.session.commit()
+    
+    queries, view = count_queries(user_id=99)
+    
+    assert queries == 1
+    assert [a['user_progress'] for a in view] == [0] * 5
+    assert not any(a['is_earned'] for a in view)
@@ -0,0 +1,190 @@
+import bisect
+import random
+from collections import deque
+
+import pytest
+from flask import Flask
+
+import Main
+from Main import (Leaderboard, LeaderboardEntry, SortedKeyList, decode_leaderboard_cursor,
+                  encode_leaderboard_cursor, get_leaderboard, leaderboard_page, reload_leaderboard, update_leaderboard)
+from models import db, UserAcc
+
+
+@pytest.fixture
+def app(monkeypatch):
+    """A throwaway app bound to an in-memory SQLite database, with no leaderboard loaded."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    monkeypatch.setattr(Main, '_leaderboard', None)
+    monkeypatch.setattr(Main, '_leaderboard_changes', deque(maxlen=Main.LEADERBOARD_CHANGE_LOG_SIZE))
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+def seed(points_by_name):
+    for user_id, (name, points) in enumerate(points_by_name, start=1):
+        db.session.add(UserAcc(user_id=user_id, name=name, email=f'user{user_id}@example.com',
+                               password='x', total_points=points))
+    db.session.commit()
+
+
+def names(rows):
+    return [entry.name for _, entry in rows]
+
+
+def test_sorted_key_list_matches_a_sorted_list():
+    rng = random.Random(7)
+    keys = SortedKeyList(load=4)
+    expected = []
+    
+    for step in range(3000):
+        if expected and rng.random() < 0.4:
+            key = expected.pop(rng.randrange(len(expected)))
+            keys.remove(key)
+        else:
+            key = (rng.randrange(50), rng.randrange(10 ** 6))
+            expected.append(key)
+            keys.add(key)
+        expected.sort()
+        
+        probe = (rng.randrange(50), rng.randrange(10 ** 6))
+        start = rng.randrange(len(expected) + 1)
+        assert len(keys) == len(expected)
+        assert keys.bisect_left(probe) == bisect.bisect_left(expected, probe)
+        assert keys.bisect_right(probe) == bisect.bisect_right(expected, probe)
+        assert keys.slice(start, start + 9) == expected[start:start + 9]
+
+
+def test_ties_order_by_name_then_user_id():
+    board = Leaderboard([
+        LeaderboardEntry(1, 'bea', None, 50, 0),
+        LeaderboardEntry(2, 'ana', None, 50, 0),
+        LeaderboardEntry(3, 'cid', None, 90, 0),
+        LeaderboardEntry(4, 'ana', None, 50, 0),
+        LeaderboardEntry(5, 'dan', None, 10, 0),
+    ])
+    
+    assert [entry.user_id for _, entry in board.top(5)] == [3, 2, 4, 1, 5]
+    assert [board.rank(user_id) for user_id in (3, 2, 4, 1, 5)] == [1, 2, 3, 4, 5]
+    # Paging after a tied entry continues inside its tie group
+    assert [entry.user_id for _, entry in board.after(board.get(2).sort_key, 2)] == [4, 1]
+    assert [rank for rank, _ in board.around(4, radius=1)] == [2, 3, 4]
+
+
+def test_update_moves_the_user(app):
+    seed([('ana', 30), ('bea', 20), ('cid', 10)])
+    board = get_leaderboard()
+    assert board.rank(3) == 3
+    
+    user = db.session.get(UserAcc, 3)
+    user.total_points = 40
+    db.session.commit()
+    update_leaderboard(user, words_learned=1)
+    
+    assert names(board.top(3)) == ['cid', 'ana', 'bea']
+    assert board.get(3).words == 1
+    
+    user.is_admin = True
+    db.session.commit()
+    update_leaderboard(user)
+    assert len(board) == 2 and board.rank(3) is None
+
+
+def test_changes_during_a_reload_are_replayed_on_the_new_board(app, monkeypatch):
+    seed([('ana', 30), ('bea', 20), ('cid', 10)])
+    old = get_leaderboard()
+    load = Main.load_leaderboard_entries
+    
+    def load_then_update(user_ids=None):
+        entries = load(user_ids)
+        if user_ids is None:
+            # A request commits and applies its change after the reload has read the users
+            user = db.session.get(UserAcc, 3)
+            user.total_points = 99
+            db.session.commit()
+            update_leaderboard(user)
+        return entries
+    
+    monkeypatch.setattr(Main, 'load_leaderboard_entries', load_then_update)
+    board = reload_leaderboard()
+    
+    assert board is not old and Main._leaderboard is board
+    assert names(board.top(3)) == ['cid', 'ana', 'bea']
+    assert names(old.top(3)) == ['cid', 'ana', 'bea']
+
+
+def test_overflowing_the_change_log_forces_another_reload(app, monkeypatch):
+    seed([('ana', 30), ('bea', 20), ('cid', 10)])
+    get_leaderboard()
+    monkeypatch.setattr(Main, '_leaderboard_changes', deque(maxlen=1))
+    load = Main.load_leaderboard_entries
+    
+    def load_then_update(user_ids=None):
+        entries = load(user_ids)
+        if user_ids is None:
+            for user in UserAcc.query.all():
+                user.total_points += 100
+                db.session.commit()
+                update_leaderboard(user)
+        return entries
+    
+    monkeypatch.setattr(Main, 'load_leaderboard_entries', load_then_update)
+    board = reload_leaderboard()
+    
+    # Only the last change was still logged, so the board is marked stale
+    assert board.get(3).points == 110 and board.get(1).points == 30
+    assert board.loaded_at == float('-inf')
+
+
+@pytest.mark.parametrize('entry', [
+    LeaderboardEntry(7, 'ana', None, 120, 3),
+    LeaderboardEntry(8, 'Zoë 🐉', None, 0, 0),
+    LeaderboardEntry(9, '', None, 10 ** 12, 0),
+])
+def test_cursor_round_trip(entry):
+    cursor = encode_leaderboard_cursor(entry)
+    
+    assert '=' not in cursor
+    assert decode_leaderboard_cursor(cursor) == entry.sort_key
+
+
+@pytest.mark.parametrize('cursor', ['', 'not base64!', 'W10', 'WzEsMiwzXQ', 'WyIxMCIsImFuYSIsN10'])
+def test_malformed_cursors_are_rejected(cursor):
+    # '' / garbage / [] / [1, 2, 3] (name not a string) / ["10", "ana", 7] (points not an int)
+    assert decode_leaderboard_cursor(cursor) is None
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 5])
+def test_cursor_pages_split_tie_groups_cleanly(limit):
+    # Three tie groups, with equal names inside the middle one
+    board = Leaderboard([
+        LeaderboardEntry(user_id, name, None, points, 0)
+        for user_id, name, points in [(1, 'eve', 30), (2, 'bob', 20), (3, 'bob', 20), (4, 'amy', 20),
+                                      (5, 'bob', 20), (6, 'cal', 10), (7, 'cal', 10), (8, 'ada', 10)]
+    ])
+    
+    seen, cursor = [], None
+    while True:
+        page = leaderboard_page(board, cursor, limit, current_user_id=4)
+        seen += [(entry['rank'], entry['user_id']) for entry in page['entries']]
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    
+    assert seen == list(enumerate([1, 4, 2, 3, 5, 8, 6, 7], start=1))
+
+
+def test_cursor_survives_its_user_moving():
+    board = Leaderboard([LeaderboardEntry(user_id, f'user{user_id}', None, 100 - user_id, 0) for user_id in range(1, 6)])
+    page = leaderboard_page(board, None, 2, current_user_id=1)
+    
+    # The last user on the page climbs to the top before the next page is fetched
+    board.put(LeaderboardEntry(2, 'user2', None, 500, 0))
+    
+    next_page = leaderboard_page(board, page['next_cursor'], 2, current_user_id=1)
+    assert [entry['user_id'] for entry in next_page['entries']] == [3, 4]
+    assert leaderboard_page(board, 'bad cursor', 2, current_user_id=1) is None
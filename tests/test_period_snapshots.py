@@ -0,0 +1,97 @@
+from datetime import date
+
+import pytest
+from flask import Flask
+from sqlalchemy import event
+
+import Main
+from Main import get_period_board, snapshot_closed_periods, snapshot_period
+from models import db, UserAcc, UserPeriodStats, LeaderboardSnapshot, SnapshottedPeriod
+
+WEEK = date(2024, 1, 1)  # a Monday, long closed
+TODAY = date(2024, 3, 4)
+
+
+@pytest.fixture
+def app():
+    """A throwaway app bound to an in-memory SQLite database."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+def seed(exp_by_name):
+    for user_id, (name, exp_earned) in enumerate(exp_by_name, start=1):
+        db.session.add(UserAcc(user_id=user_id, name=name, email=f'user{user_id}@example.com', password='x'))
+        db.session.add(UserPeriodStats(user_id=user_id, period_type='week', period_start=WEEK,
+                                       exp_earned=exp_earned, words_learned=exp_earned // 10))
+    db.session.commit()
+
+
+def snapshot_rows():
+    return [(row.rank, row.user_id) for row in LeaderboardSnapshot.query.order_by(LeaderboardSnapshot.rank)]
+
+
+def test_snapshot_ranks_ties_by_name_then_user_id(app):
+    seed([('cid', 20), ('ana', 30), ('bea', 20), ('bea', 20), ('dan', 0)])
+    
+    assert snapshot_closed_periods(TODAY) == 4
+    
+    assert snapshot_rows() == [(1, 2), (2, 3), (3, 4), (4, 1)]
+    board = get_period_board('week', WEEK, 10, user_id=4)
+    assert [entry['user_id'] for entry in board['entries']] == [2, 3, 4, 1]
+    assert board['me']['rank'] == 3 and board['closed']
+
+
+def test_empty_period_is_recorded_and_not_retried(app):
+    # Rollup rows exist, but nobody earned EXP
+    seed([('ana', 0), ('bea', 0)])
+    db.session.add(UserPeriodStats(user_id=1, period_type='month', period_start=WEEK, exp_earned=0))
+    db.session.commit()
+    
+    assert snapshot_closed_periods(TODAY) == 0
+    
+    markers = {(marker.period_type, marker.period_start) for marker in SnapshottedPeriod.query}
+    assert markers == {('week', WEEK), ('month', WEEK)}
+    assert snapshot_rows() == []
+    board = get_period_board('week', WEEK, 10, user_id=1)
+    assert board['entries'] == [] and board['me'] is None
+    
+    # Nothing left to snapshot on the next scheduler pass
+    statements = []
+    
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+    
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        assert snapshot_closed_periods(TODAY) == 0
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    assert not any('INSERT' in statement for statement in statements)
+
+
+def test_second_snapshot_of_a_period_is_a_no_op(app):
+    seed([('ana', 30), ('bea', 20)])
+    assert snapshot_period('week', WEEK) == 2
+    
+    assert snapshot_period('week', WEEK) == 0
+    assert snapshot_rows() == [(1, 1), (2, 2)]
+
+
+def test_snapshot_racing_another_process_hits_the_marker_and_rolls_back(app, monkeypatch):
+    seed([('ana', 30), ('bea', 20)])
+    assert snapshot_period('week', WEEK) == 2
+    
+    # This process checked before the other one committed its snapshot
+    monkeypatch.setattr(Main, 'is_period_snapshotted', lambda period_type, start: False)
+    assert snapshot_period('week', WEEK) == 0
+    
+    assert snapshot_rows() == [(1, 1), (2, 2)]
+    assert SnapshottedPeriod.query.count() == 1
+    # The session was rolled back and is usable again
+    assert UserAcc.query.count() == 2